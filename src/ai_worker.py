@@ -0,0 +1,66 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from src import game
+
+# How long the AI may "think" before we fall back to a quick random shot
+AI_TIME_BUDGET_MS = 1000
+
+
+class AIWorker:
+    """ Runs AI decision-making on a background thread so the game loop keeps drawing.
+
+    The main loop calls start_turn() once, then poll() every frame until it returns
+    the list of targets to apply. cancel() drops a pending turn (e.g. on Quit).
+    """
+
+    def __init__(self, time_budget_ms=AI_TIME_BUDGET_MS):
+        self.time_budget_ms = time_budget_ms
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-worker")
+        self.future = None
+        self.cancel_event = None
+        self.started_at = 0
+        self.think_ms = 0  # Total time spent on AI turns, for the match history
+
+    @property
+    def busy(self):
+        return self.future is not None
+
+    def start_turn(self, state):
+        if self.future is not None:
+            return
+        self.cancel_event = threading.Event()
+        self.started_at = pygame.time.get_ticks()
+        self.future = self.executor.submit(game.choose_ai_targets, state, self.cancel_event)
+
+    def poll(self, state):
+        """ Returns the chosen targets once ready, or None while the AI is still thinking. """
+        if self.future is None:
+            return None
+
+        if self.future.done():
+            targets = self.future.result()
+            self.future = None
+            self.think_ms += pygame.time.get_ticks() - self.started_at
+            return targets
+
+        if pygame.time.get_ticks() - self.started_at > self.time_budget_ms:
+            # Out of time: stop the worker and take a cheap shot instead
+            self.think_ms += pygame.time.get_ticks() - self.started_at
+            self.cancel()
+            return game.fallback_ai_targets(state)
+
+        return None
+
+    def cancel(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+        self.future = None
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,125 @@
+""" Sound effects and music behind one small dispatcher.
+
+The mixer is opened with a short buffer so effects start within a few milliseconds of
+the shot that triggers them. Every sound belongs to a category with its own reserved
+channels; when all of them are busy the voice that started first is cut off, so a
+HARD volley never waits for a free channel and never drowns out the other categories.
+Music files are read into memory once and streamed from there on later scene changes.
+
+BATTLESHIPS_AUDIO=null (or a machine without an audio device) selects NullAudio,
+which accepts the same calls and does nothing, for simulations and headless runs.
+"""
+import io
+import os
+
+import pygame
+
+AUDIO_BACKEND = os.environ.get("BATTLESHIPS_AUDIO", "mixer")
+
+MIXER_FREQUENCY = 44100
+MIXER_BUFFER = int(os.environ.get("BATTLESHIPS_AUDIO_BUFFER", 512))  # Samples; ~12 ms at 44.1 kHz
+
+# Reserved channels per sound category
+CHANNEL_POOLS = {
+    "explosion": 3,
+    "splash": 3,
+    "jingle": 1,
+}
+
+_audio = None
+
+
+class MixerAudio:
+    name = "mixer"
+
+    def __init__(self, pools=CHANNEL_POOLS, buffer=MIXER_BUFFER):
+        # pygame.init() has usually opened the mixer with default settings already
+        pygame.mixer.quit()
+        pygame.mixer.init(frequency=MIXER_FREQUENCY, buffer=buffer)
+        total = sum(pools.values())
+        pygame.mixer.set_num_channels(total)
+        pygame.mixer.set_reserved(total)  # Nothing outside the pools may grab these channels
+
+        self.pools = {}
+        first = 0
+        for category, size in pools.items():
+            self.pools[category] = [pygame.mixer.Channel(i) for i in range(first, first + size)]
+            first += size
+        self.started = {}  # Channel -> play counter when its current voice started
+        self.plays = 0
+        self.sounds = {}  # Name -> (Sound, category)
+        self.music = {}  # Path -> file contents, or None if the file couldn't be played
+        self.current_music = None
+
+    def load(self, name, path, category, volume=0.7):
+        sound = pygame.mixer.Sound(path)
+        sound.set_volume(volume)
+        self.sounds[name] = (sound, category)
+
+    def play(self, name):
+        sound, category = self.sounds[name]
+        pool = self.pools[category]
+        channel = next((channel for channel in pool if not channel.get_busy()), None)
+        if channel is None:
+            # Voice stealing: cut off the oldest sound in this category
+            channel = min(pool, key=lambda channel: self.started.get(channel, 0))
+        self.plays += 1
+        self.started[channel] = self.plays
+        channel.play(sound)
+
+    def play_music(self, path, volume=0.5):
+        if path != self.current_music:
+            if path not in self.music:
+                with open(path, "rb") as f:
+                    self.music[path] = f.read()
+            if self.music[path] is None:
+                return
+            try:
+                # Streamed from memory, so switching scenes doesn't touch the disk
+                pygame.mixer.music.load(io.BytesIO(self.music[path]), os.path.splitext(path)[1][1:])
+            except pygame.error as error:
+                print(f"Can't play {path}: {error}")
+                self.music[path] = None
+                return
+            pygame.mixer.music.set_volume(volume)
+            self.current_music = path
+        pygame.mixer.music.play(-1)  # Play in an infinite loop
+
+    def stop_music(self):
+        pygame.mixer.music.stop()
+
+    def restart_music(self):
+        if self.current_music is not None:
+            pygame.mixer.music.play(-1)
+
+
+class NullAudio:
+    name = "null"
+
+    def load(self, name, path, category, volume=0.7):
+        pass
+
+    def play(self, name):
+        pass
+
+    def play_music(self, path, volume=0.5):
+        pass
+
+    def stop_music(self):
+        pass
+
+    def restart_music(self):
+        pass
+
+
+def get_audio():
+    """ The session's audio dispatcher, created on first use. """
+    global _audio
+    if _audio is None:
+        _audio = NullAudio()
+        if AUDIO_BACKEND != "null":
+            try:
+                _audio = MixerAudio()
+            except pygame.error as error:
+                print(f"Audio unavailable ({error}), continuing without sound")
+    return _audio
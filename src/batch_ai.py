@@ -0,0 +1,194 @@
+""" Batched AI turns for many games at once, with NumPy.
+
+For servers and simulations hosting lots of games, N states are stacked into arrays
+(hits and ship occupancy, shape (N, GRID_SIZE, GRID_SIZE)) and every game's
+probability map and shot choice is computed in one vectorised pass, so the cost of a
+turn grows with the number of passes rather than the number of games.
+
+The policy matches choose_ai_targets (probability map, then opening book, then a
+random unshot cell, ties broken at random) except for the exact endgame search,
+which is a per-game tree search and stays in endgame.py.
+
+Benchmark from src/ with the repo root on PYTHONPATH:
+
+    PYTHONPATH=.. python batch_ai.py --games 1000
+"""
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+# Nothing here draws or plays sound, but the game module sets both up on import
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("BATTLESHIPS_AUDIO", "null")
+
+from src import game, opening_book, placement_heatmap
+
+NO_SHOT = -1
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+# Opening books as flat cell index arrays, one row per symmetry, keyed by (grid_size, ship sizes)
+_books = {}
+
+
+def stack_states(states):
+    """ (hits, occupied): the AI's hit grids (0 unshot, 1 miss, 2 hit) and the player fleets. """
+    hits = np.array([state.ai_hits for state in states], dtype=np.int8)
+    occupied = np.array([[[cell is not None for cell in row] for row in state.player_board]
+                         for state in states], dtype=bool)
+    return hits, occupied
+
+
+def shifted(grid, dx, dy):
+    """ grid moved by (dx, dy) along the board axes, zero-filled; out[:, y, x] = grid[:, y - dy, x - dx]. """
+    out = np.zeros_like(grid)
+    size = grid.shape[1]
+    out[:, max(dy, 0):size + min(dy, 0), max(dx, 0):size + min(dx, 0)] = \
+        grid[:, max(-dy, 0):size + min(-dy, 0), max(-dx, 0):size + min(-dx, 0)]
+    return out
+
+
+def probability_maps(hits, hit_weight=None, line_bonus=None):
+    """ compute_probability_map for every game in the batch. """
+    hit_weight = game.HIT_WEIGHT if hit_weight is None else hit_weight
+    line_bonus = game.LINE_BONUS if line_bonus is None else line_bonus
+    hit = (hits == 2).astype(np.int32)
+    unshot = hits == 0
+    probability = np.zeros(hits.shape, dtype=np.int32)
+    for dx, dy in DIRECTIONS:
+        # Unshot cells one step from a hit, plus a bonus if the cell behind that hit is a hit too
+        next_to_hit = shifted(hit, dx, dy)
+        in_line = shifted(hit * shifted(hit, dx, dy), dx, dy)
+        probability += np.where(unshot, hit_weight * next_to_hit + line_bonus * in_line, 0)
+    return probability
+
+
+def pick_random(mask, rng):
+    """ Flat index of a uniformly random True cell per game, NO_SHOT where there is none. """
+    flat = mask.reshape(len(mask), -1)
+    keys = np.where(flat, rng.random(flat.shape), -1.0)
+    choice = keys.argmax(axis=1)
+    return np.where(flat.any(axis=1), choice, NO_SHOT)
+
+
+def choose_shots(hits, probability, books, rng):
+    """ One shot per game as a flat cell index (y * GRID_SIZE + x), NO_SHOT if the board is full.
+
+    books holds each game's opening book, shape (N, book length).
+    """
+    unshot = hits == 0
+    count = len(hits)
+    best = probability.reshape(count, -1).max(axis=1)
+    shots = pick_random(unshot & (probability == best[:, None, None]) & (best[:, None, None] > 0), rng)
+
+    # No hits to chase: first book cell not fired at yet
+    need = shots == NO_SHOT
+    if need.any() and books.shape[1]:
+        open_book = np.take_along_axis(hits.reshape(count, -1), books, axis=1) == 0
+        has_book = open_book.any(axis=1)
+        book_shots = books[np.arange(count), open_book.argmax(axis=1)]
+        shots = np.where(need & has_book, book_shots, shots)
+
+    # Book used up: any unshot cell
+    need = shots == NO_SHOT
+    if need.any():
+        shots = np.where(need, pick_random(unshot, rng), shots)
+    return shots
+
+
+def book_indices(grid_size, ship_sizes):
+    key = (grid_size, tuple(ship_sizes))
+    if key not in _books:
+        books = [opening_book.load_opening_book(grid_size, ship_sizes, symmetry)
+                 for symmetry in range(opening_book.BOOK_SYMMETRIES)]
+        _books[key] = np.array([[y * grid_size + x for x, y in book] for book in books], dtype=np.intp)
+    return _books[key]
+
+
+def batch_ai_targets(hits, occupied, num_shots, book_symmetries, rng=None):
+    """ Every game's shots for this turn, shape (N, max(num_shots)), NO_SHOT past each game's count.
+
+    num_shots holds the shots each game fires this turn and book_symmetries the symmetry
+    each game plays its opening book under (GameState.book_symmetry). hits is not modified.
+    """
+    rng = rng or np.random.default_rng()
+    hits = hits.copy()
+    num_shots = np.asarray(num_shots)
+    books = book_indices(game.GRID_SIZE, [size for size, _, _ in game.SHIPS.values()])[book_symmetries]
+
+    count = len(hits)
+    games = np.arange(count)
+    flat_hits = hits.reshape(count, -1)
+    flat_occupied = occupied.reshape(count, -1)
+    targets = np.full((count, num_shots.max(initial=0)), NO_SHOT, dtype=np.intp)
+    for shot in range(targets.shape[1]):
+        shots = choose_shots(hits, probability_maps(hits), books, rng)
+        shots = np.where(num_shots > shot, shots, NO_SHOT)
+        targets[:, shot] = shots
+        # Resolve the shots so the next pass sees them, like choose_ai_targets does
+        fired = shots != NO_SHOT
+        flat_hits[games[fired], shots[fired]] = np.where(flat_occupied[games[fired], shots[fired]], 2, 1)
+    return targets
+
+
+def batch_choose_ai_targets(states, rng=None):
+    """ choose_ai_targets for many GameStates at once (without the endgame search): [[(x, y), ...], ...] """
+    rng = rng or np.random.default_rng()
+    hits, occupied = stack_states(states)
+    num_shots = [random.choice(game.AI_SHOT_OPTIONS) for _ in states]
+    targets = batch_ai_targets(hits, occupied, num_shots, [state.book_symmetry for state in states], rng)
+    return [[(cell % game.GRID_SIZE, cell // game.GRID_SIZE) for cell in row if cell != NO_SHOT]
+            for row in targets.tolist()]
+
+
+def random_fleets(count, rng):
+    """ Occupancy grids of count random fleets, for benchmarks and simulations. """
+    sizes = [size for size, _, _ in game.SHIPS.values()]
+    occupied = np.zeros((count, game.GRID_SIZE, game.GRID_SIZE), dtype=bool)
+    for i in range(count):
+        layout = placement_heatmap.random_layout(game.GRID_SIZE, sizes, rng)
+        for (row, col, orientation), size in zip(layout, sizes):
+            for x, y in placement_heatmap.ship_cells(row, col, orientation, size):
+                occupied[i, y, x] = True
+    return occupied
+
+
+def play_out(occupied, rng):
+    """ Plays every game to the end with one shot per turn; returns the turns each game took. """
+    count = len(occupied)
+    hits = np.zeros(occupied.shape, dtype=np.int8)
+    turns = np.zeros(count, dtype=np.int32)
+    ship_cells = occupied.reshape(count, -1).sum(axis=1)
+    book_symmetries = rng.integers(opening_book.BOOK_SYMMETRIES, size=count)
+    while True:
+        playing = (hits == 2).reshape(count, -1).sum(axis=1) < ship_cells
+        if not playing.any():
+            return turns
+        targets = batch_ai_targets(hits, occupied, playing.astype(int), book_symmetries, rng)[:, 0]
+        fired = targets != NO_SHOT
+        hits.reshape(count, -1)[fired, targets[fired]] = \
+            np.where(occupied.reshape(count, -1)[fired, targets[fired]], 2, 1)
+        turns += playing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched AI throughput benchmark")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    game.set_difficulty("EASY")
+    for batch in sorted({1, 10, 100, args.games}):
+        occupied = random_fleets(batch, random.Random(args.seed))
+        start = time.perf_counter()
+        turns = play_out(occupied, rng)
+        elapsed = time.perf_counter() - start
+        print(f"batch {batch:>5}: {turns.sum() / elapsed:10.0f} shots/s, {turns.mean():.1f} shots per game")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+""" Exact endgame search for the AI.
+
+Once only a few ship cells are still unfound, every fleet layout consistent with the
+AI's hits and misses is enumerated (as bitmasks). Since a shot only reveals hit/miss,
+layouts are grouped by the set of cells they occupy, weighted by how many fleet
+layouts produce that set. The solver then picks the shot minimising the expected
+number of shots left, memoising positions in a transposition table keyed by the
+weighted set of unfound-cell bitmasks that are still possible.
+
+A multi-shot turn calls best_shot() once per shot, so the caller takes one
+turn_deadline() for the whole turn and passes it to every call. With time_budget=None
+the search is limited only by the layout and position caps, so simulations give the
+same shots on any machine.
+"""
+import time
+
+ENDGAME_MAX_REMAINING = 6  # Only search once at most this many ship cells are unfound
+ENDGAME_MAX_LAYOUTS = 20000  # Give up on enumeration beyond this many fleet layouts
+ENDGAME_EXACT_MAX = 16  # Exact search only below this many distinct unfound-cell sets
+ENDGAME_TIME_BUDGET = 0.5  # Seconds per AI turn (all its shots), kept below the AI worker's time budget
+TABLE_MAX_SIZE = 200000
+
+
+class SearchAborted(Exception):
+    pass
+
+
+def board_masks(hits, grid_size):
+    """ (hit_mask, miss_mask) with bit y * grid_size + x set per cell. """
+    hit_mask = miss_mask = 0
+    for y in range(grid_size):
+        for x in range(grid_size):
+            if hits[y][x] == 2:
+                hit_mask |= 1 << (y * grid_size + x)
+            elif hits[y][x] == 1:
+                miss_mask |= 1 << (y * grid_size + x)
+    return hit_mask, miss_mask
+
+
+def placement_masks(grid_size, size, miss_mask):
+    masks = []
+    for y in range(grid_size):
+        for x in range(grid_size):
+            if x + size <= grid_size:
+                masks.append(sum(1 << (y * grid_size + x + i) for i in range(size)))
+            if size > 1 and y + size <= grid_size:
+                masks.append(sum(1 << ((y + i) * grid_size + x) for i in range(size)))
+    return [mask for mask in masks if not mask & miss_mask]
+
+
+def consistent_layouts(grid_size, ship_sizes, hit_mask, miss_mask, limit, should_stop):
+    """ {occupied cells mask: number of fleet layouts} covering every hit and no miss, or None past limit. """
+    # Most constrained ship (fewest legal placements) first
+    fleet = sorted(((placement_masks(grid_size, size, miss_mask), size) for size in ship_sizes),
+                   key=lambda item: len(item[0]))
+    ships = [placements for placements, _ in fleet]
+    # remaining_cells[i]: cells the ships from i onwards can still cover
+    remaining_cells = [0] * (len(fleet) + 1)
+    for i in range(len(fleet) - 1, -1, -1):
+        remaining_cells[i] = remaining_cells[i + 1] + fleet[i][1]
+
+    layouts = {}
+    visited = [0, 0]  # Complete layouts, search nodes
+
+    def place(i, occupied):
+        visited[1] += 1
+        if visited[1] % 1024 == 0 and should_stop():
+            raise SearchAborted
+        uncovered = bin(hit_mask & ~occupied).count("1")
+        if uncovered > remaining_cells[i]:
+            return  # The ships left can't cover the hits left
+        if i == len(ships):
+            layouts[occupied] = layouts.get(occupied, 0) + 1
+            visited[0] += 1
+            if visited[0] > limit:
+                raise SearchAborted
+            return
+        for mask in ships[i]:
+            if not mask & occupied:
+                place(i + 1, occupied | mask)
+
+    try:
+        place(0, 0)
+    except SearchAborted:
+        return None
+    return layouts
+
+
+class EndgameSolver:
+    def __init__(self, time_budget=ENDGAME_TIME_BUDGET):
+        self.time_budget = time_budget  # None: no wall-clock limit
+        # Transposition table: position hash -> (expected shots left, best cell)
+        self.table = {}
+
+    def turn_deadline(self):
+        """ perf_counter() time the searches of one AI turn must finish by, or None. """
+        return None if self.time_budget is None else time.perf_counter() + self.time_budget
+
+    def best_shot(self, hits, grid_size, ship_sizes, cancel_event=None, deadline=None):
+        """ (x, y) to fire at, or None if the position is still too open to solve in time. """
+        hit_mask, miss_mask = board_masks(hits, grid_size)
+        if sum(ship_sizes) - bin(hit_mask).count("1") > ENDGAME_MAX_REMAINING:
+            return None
+
+        def should_stop():
+            if deadline is not None and time.perf_counter() > deadline:
+                return True
+            return cancel_event is not None and cancel_event.is_set()
+
+        layouts = consistent_layouts(grid_size, ship_sizes, hit_mask, miss_mask, ENDGAME_MAX_LAYOUTS, should_stop)
+        if not layouts:
+            return None
+
+        if len(self.table) > TABLE_MAX_SIZE:
+            self.table.clear()
+        # Only the still-unfound cells of each layout matter from here on
+        unfound = {}
+        for occupied, count in layouts.items():
+            unfound[occupied & ~hit_mask] = unfound.get(occupied & ~hit_mask, 0) + count
+        try:
+            if len(unfound) > ENDGAME_EXACT_MAX:
+                raise SearchAborted
+            _, cell = self.solve(unfound, should_stop)
+        except SearchAborted:
+            # Too open or out of time: settle for the cell most likely to be a hit
+            cell = self.most_likely_cell(unfound)
+        if cell is None:
+            return None
+        return cell % grid_size, cell // grid_size
+
+    @staticmethod
+    def most_likely_cell(layouts):
+        weights = {}
+        for remaining, count in layouts.items():
+            while remaining:
+                bit = remaining & -remaining
+                cell = bit.bit_length() - 1
+                weights[cell] = weights.get(cell, 0) + count
+                remaining ^= bit
+        return max(weights, key=weights.get) if weights else None
+
+    @staticmethod
+    def lower_bound(layouts):
+        # No layout can be finished in fewer shots than it has unfound cells
+        return min(bin(remaining).count("1") for remaining in layouts)
+
+    def solve(self, layouts, should_stop):
+        """ (expected shots left, best cell) for {unfound cells mask: weight}. """
+        # The position hash: which unfound-cell sets are still possible, and how likely
+        key = frozenset(layouts.items())
+        if key in self.table:
+            return self.table[key]
+        if should_stop():
+            raise SearchAborted
+
+        if len(layouts) == 1:
+            remaining = next(iter(layouts))
+            cell = (remaining & -remaining).bit_length() - 1 if remaining else None
+            result = (bin(remaining).count("1"), cell)
+            self.table[key] = result
+            return result
+
+        total = sum(layouts.values())
+        certain = ~0
+        possible = 0
+        for remaining in layouts:
+            certain &= remaining
+            possible |= remaining
+        informative = possible & ~certain
+
+        # Split the layouts on every informative cell, most likely hits first
+        splits = []
+        while informative:
+            bit = informative & -informative
+            informative ^= bit
+            on_hit = {}
+            on_miss = {}
+            for remaining, count in layouts.items():
+                if remaining & bit:
+                    on_hit[remaining ^ bit] = count
+                else:
+                    on_miss[remaining] = count
+            splits.append((sum(on_hit.values()) / total, bit, on_hit, on_miss))
+        splits.sort(key=lambda split: -split[0])
+
+        best = (float("inf"), None)
+        for p_hit, bit, on_hit, on_miss in splits:
+            # Branch and bound on the cheapest conceivable outcome of this shot
+            bound = 1 + p_hit * self.lower_bound(on_hit) + (1 - p_hit) * self.lower_bound(on_miss)
+            if bound >= best[0]:
+                continue
+            expected = 1 + p_hit * self.solve(on_hit, should_stop)[0] \
+                + (1 - p_hit) * self.solve(on_miss, should_stop)[0]
+            if expected < best[0]:
+                best = (expected, bit.bit_length() - 1)
+
+        if best[1] is None:
+            # Nothing left to learn: just take the cells every layout shares
+            best = (bin(certain).count("1"), (certain & -certain).bit_length() - 1)
+
+        self.table[key] = best
+        return best
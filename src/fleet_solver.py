@@ -0,0 +1,176 @@
+""" Backtracking fleet placement for dense or custom fleets.
+
+Rejection sampling (drop a ship anywhere, retry on overlap) is fine for the standard
+fleet, but slows down sharply as the board fills up and never terminates for a fleet
+that doesn't fit. This solver works on bitmasks instead: every legal placement of a
+ship is precomputed as the mask of cells it covers plus the mask it blocks for other
+ships (itself, or itself and its neighbours under the no-touch rule). The search then
+always places next the ship with the fewest legal placements left, backtracks as soon
+as any unplaced ship has none, and treats ships of equal size as interchangeable so
+their orderings aren't searched more than once. Once every cell the remaining ships
+can still reach has to be filled, it switches to filling the first such cell, which
+is what makes near-perfect packings tractable.
+
+Fleets that can't fit by area are rejected before any search. The search itself is
+capped at a node budget, so a call always returns in bounded time, and restarts with a
+fresh random order whenever an attempt gets stuck.
+"""
+import random
+
+SEARCH_NODE_LIMIT = 200000
+RESTART_NODE_LIMIT = 500  # Node limit of the first attempt; doubled on every restart
+
+
+class PlacementError(ValueError):
+    pass
+
+
+class SearchRestart(Exception):
+    pass
+
+
+def cell_bit(grid_size, x, y):
+    return 1 << (y * grid_size + x)
+
+
+def ship_placements(grid_size, size, no_touch=False):
+    """ [(cells mask, blocked mask, (row, col, orientation))] for every in-bounds placement. """
+    placements = []
+    for orientation in ('H', 'V') if size > 1 else ('H',):
+        width, height = (size, 1) if orientation == 'H' else (1, size)
+        for row in range(grid_size - height + 1):
+            for col in range(grid_size - width + 1):
+                cells = blocked = 0
+                for y in range(row, row + height):
+                    for x in range(col, col + width):
+                        cells |= cell_bit(grid_size, x, y)
+                if no_touch:
+                    # Neighbouring cells (diagonals included) can't hold another ship
+                    for y in range(max(row - 1, 0), min(row + height + 1, grid_size)):
+                        for x in range(max(col - 1, 0), min(col + width + 1, grid_size)):
+                            blocked |= cell_bit(grid_size, x, y)
+                else:
+                    blocked = cells
+                placements.append((cells, blocked, (row, col, orientation)))
+    return placements
+
+
+def check_fleet(grid_size, ship_sizes, no_touch=False):
+    """ Raises PlacementError for fleets that can't fit whatever the layout. """
+    if any(size > grid_size for size in ship_sizes):
+        raise PlacementError(f"a ship of size {max(ship_sizes)} doesn't fit on a {grid_size}x{grid_size} grid")
+    if no_touch:
+        # Each ship plus the row and column of water after it, on a board one cell larger
+        needed, available = sum(2 * (size + 1) for size in ship_sizes), (grid_size + 1) ** 2
+    else:
+        needed, available = sum(ship_sizes), grid_size ** 2
+    if needed > available:
+        raise PlacementError(f"fleet needs {needed} cells but the grid only offers {available}")
+
+
+def solve_fleet(grid_size, ship_sizes, no_touch=False, rng=random, node_limit=SEARCH_NODE_LIMIT):
+    """ One (row, col, orientation) per ship, in ship_sizes order. Raises PlacementError if there is none. """
+    check_fleet(grid_size, ship_sizes, no_touch)
+
+    groups = {}  # Ship size -> indices of the ships of that size
+    for index, size in enumerate(ship_sizes):
+        groups.setdefault(size, []).append(index)
+    placements = {size: ship_placements(grid_size, size, no_touch) for size in groups}
+    left = dict.fromkeys(groups, 0)
+    # Equal ships take increasing placement indices, so each set is only searched once
+    next_index = dict.fromkeys(groups, 0)
+    chosen = {size: [] for size in groups}
+    nodes = [0, 0]  # Nodes in this attempt, nodes in all attempts
+
+    def candidates(size, blocked):
+        start = next_index[size]
+        return [i for i in range(start, len(placements[size])) if not placements[size][i][0] & blocked]
+
+    def search(blocked, cells_left, attempt_limit):
+        nodes[0] += 1
+        if nodes[0] > attempt_limit:
+            raise SearchRestart
+        if cells_left == 0:
+            return True
+
+        # Most constrained first; an unplaceable ship means this branch is dead
+        best_size, best = None, None
+        coverable = 0
+        for size, count in left.items():
+            if not count:
+                continue
+            options = candidates(size, blocked)
+            if len(options) < count:
+                return False
+            if best is None or len(options) < len(best):
+                best_size, best = size, options
+            for i in options:
+                coverable |= placements[size][i][0]
+
+        # Cells no remaining ship can reach are dead; the rest must hold every cell still to place
+        slack = bin(coverable).count("1") - cells_left
+        if slack < 0:
+            return False
+        if slack == 0:
+            # Every reachable cell has to be filled: branch on what fills the first one instead
+            return fill_first_cell(blocked, cells_left, coverable, attempt_limit)
+
+        saved = next_index[best_size]
+        left[best_size] -= 1
+        for i in best:
+            _, blocked_by_ship, placement = placements[best_size][i]
+            next_index[best_size] = i + 1
+            chosen[best_size].append(placement)
+            if search(blocked | blocked_by_ship, cells_left - best_size, attempt_limit):
+                return True
+            chosen[best_size].pop()
+        left[best_size] += 1
+        next_index[best_size] = saved
+        return False
+
+    def fill_first_cell(blocked, cells_left, coverable, attempt_limit):
+        # Cells before the first reachable one are all filled or dead, so only placements
+        # starting on it can cover it. Those branches never produce the same layout twice.
+        cell = coverable & -coverable
+        for size, count in left.items():
+            if not count:
+                continue
+            left[size] -= 1
+            for i in candidates(size, blocked):
+                cells, blocked_by_ship, placement = placements[size][i]
+                if not cells & cell:
+                    continue
+                chosen[size].append(placement)
+                if search(blocked | blocked_by_ship, cells_left - size, attempt_limit):
+                    return True
+                chosen[size].pop()
+            left[size] += 1
+        return False
+
+    # Search times are heavy-tailed, so restart with a fresh random order and a doubled
+    # node limit rather than sink the whole budget into one unlucky branch
+    attempt_limit = RESTART_NODE_LIMIT
+    while True:
+        for size, indices in groups.items():
+            rng.shuffle(placements[size])  # Random candidate order gives random layouts
+            left[size], next_index[size], chosen[size] = len(indices), 0, []
+        nodes[0] = 0
+        try:
+            if not search(0, sum(ship_sizes), min(attempt_limit, node_limit - nodes[1])):
+                # The whole tree was searched, so this is a proof rather than bad luck
+                raise PlacementError("no layout exists for this fleet")
+            break
+        except SearchRestart:
+            nodes[1] += nodes[0]
+            if nodes[1] >= node_limit:
+                raise PlacementError(f"no layout found within {node_limit} search nodes") from None
+            attempt_limit *= 2
+
+    # Hand the placements back in fleet order, shuffled within each size
+    layout = [None] * len(ship_sizes)
+    for size, indices in groups.items():
+        shuffled = list(chosen[size])
+        rng.shuffle(shuffled)
+        for index, placement in zip(indices, shuffled):
+            layout[index] = placement
+    return layout
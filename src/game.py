@@ -1,7 +1,17 @@
+import json
 import pygame
 import random
 import sys
-from src import menu
+import time
+from src import fleet_solver, menu, opening_book, placement_heatmap
+from src.audio import get_audio
+from src.match_history import Match
+from src.endgame import EndgameSolver
+from src.input_dispatch import CellLookup, LatencyTracker, LATENCY_REPORT
+from src.render_backend import create_backend
+from src.shot_analytics import layout_exposure
+from src.timestep import FixedTimestep
+from src.turn_history import TurnHistory
 
 pygame.init()
 # Game Constants
@@ -23,9 +33,39 @@ HIGHLIGHT = (100, 200, 100)
 INVALID = (200, 50, 50)
 FOG_COLOR = (70, 70, 70)  # Semi-transparent dark fog
 
+# AI targeting weights: cells next to a hit, plus a bonus for extending a line of hits
+DEFAULT_HIT_WEIGHT = 10
+DEFAULT_LINE_BONUS = 0
+HIT_WEIGHT = DEFAULT_HIT_WEIGHT
+LINE_BONUS = DEFAULT_LINE_BONUS
+
+# Tuned presets written by tuning.py; set_difficulty falls back to the defaults below without it
+PRESETS_PATH = "../assets/Data/difficulty_presets.json"
+
+def load_difficulty_presets():
+    try:
+        with open(PRESETS_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
 # Difficulty settings
 def set_difficulty(difficulty):
-    global AI_SHOT_OPTIONS, MAX_HINTS, ENABLE_FOG, FOG_SIZE
+    global AI_SHOT_OPTIONS, MAX_HINTS, ENABLE_FOG, FOG_SIZE, HIT_WEIGHT, LINE_BONUS
+    preset = load_difficulty_presets().get(difficulty)
+    if preset:
+        AI_SHOT_OPTIONS = preset["ai_shot_options"]
+        MAX_HINTS = preset["max_hints"]
+        ENABLE_FOG = preset["enable_fog"]
+        if ENABLE_FOG:
+            FOG_SIZE = tuple(preset["fog_size"])
+        HIT_WEIGHT = preset.get("hit_weight", DEFAULT_HIT_WEIGHT)
+        LINE_BONUS = preset.get("line_bonus", DEFAULT_LINE_BONUS)
+        return
+
+    # No preset: don't keep targeting weights from a difficulty that had one
+    HIT_WEIGHT, LINE_BONUS = DEFAULT_HIT_WEIGHT, DEFAULT_LINE_BONUS
+
     if difficulty == "EASY":
         AI_SHOT_OPTIONS = [1]
         MAX_HINTS = 3
@@ -49,70 +89,142 @@ SHIPS = {
     "Rescue Ship": [3, "../assets/Sprites/BT_4_Active", "../assets/Sprites/BT_4_Deactive"],
     "Destroyer": [2, "../assets/Sprites/BT_5_Active", "../assets/Sprites/BT_5_Deactive"]
 }
-
-# Initialize mixer
-pygame.mixer.init()
-win_sound = pygame.mixer.Sound('../assets/Sounds/win.wav')
-win_sound.set_volume(0.7)
-lost_sound = pygame.mixer.Sound('../assets/Sounds/lost.mp3')
-lost_sound.set_volume(0.7)
-explosion_sound = pygame.mixer.Sound("../assets/Sounds/explosion.wav")
-explosion_sound.set_volume(0.7)
-splash_sound = pygame.mixer.Sound("../assets/Sounds/splash.wav")
-splash_sound.set_volume(0.7)
+# Ships may not touch each other, not even diagonally
+NO_TOUCH = False
+# Layouts compared against the players' opening heatmap when placing the AI fleet
+PLACEMENT_CANDIDATES = 8
+
+# Sounds are preloaded once and played through the audio dispatcher's channel pools
+audio = get_audio()
+audio.load("win", '../assets/Sounds/win.wav', "jingle")
+audio.load("lost", '../assets/Sounds/lost.mp3', "jingle")
+audio.load("explosion", "../assets/Sounds/explosion.wav", "explosion")
+audio.load("splash", "../assets/Sounds/splash.wav", "splash")
 # Fonts
 FONT = pygame.font.Font(None, 30)
 FONT_LARGE = pygame.font.Font(None, 60)
 
 
+# Sprite registry: every image is decoded once per process and shared by reference
+SPRITES = {}
+
+def load_sprite(path):
+    if path not in SPRITES:
+        SPRITES[path] = pygame.image.load(path).convert_alpha()
+    return SPRITES[path]
+
+# Scaled sprites and cropped segments, shared by every Ship with the same art and size
+SHIP_SPRITES = {}
+
+
 # 2. Modified Ship class
 class Ship:
+    """ Lightweight record: name, size and placement. Images live in the shared registry. """
+    __slots__ = ("name", "size", "orientation", "row", "col", "active_sprite", "deactive_sprite")
+
     def __init__(self, name, size, active_sprite, deactive_sprite):
         self.name = name
         self.size = size
         self.orientation = 'H'
         self.row = -1
         self.col = -1
-        # Load H and V sprites for active and deactive states
-        self.active_H = pygame.image.load(f"{active_sprite}_H.png").convert_alpha()
-        self.active_V = pygame.image.load(f"{active_sprite}_V.png").convert_alpha()
-        self.deactive_H = pygame.image.load(f"{deactive_sprite}_H.png").convert_alpha()
-        self.deactive_V = pygame.image.load(f"{deactive_sprite}_V.png").convert_alpha()
+        self.active_sprite = active_sprite
+        self.deactive_sprite = deactive_sprite
+
+    def cached(self, key, build):
+        key = (self.active_sprite, self.deactive_sprite, self.size) + key
+        if key not in SHIP_SPRITES:
+            SHIP_SPRITES[key] = build()
+        return SHIP_SPRITES[key]
+
+    def base_sprite(self, orientation, is_deactive):
+        # H and V sprites for active and deactive states
+        prefix = self.deactive_sprite if is_deactive else self.active_sprite
+        return load_sprite(f"{prefix}_{orientation}.png")
 
     def get_sprite(self, is_deactive=False):
+        orientation = self.orientation
+        return self.cached((orientation, is_deactive), lambda: self.build_sprite(orientation, is_deactive))
+
+    def build_sprite(self, orientation, is_deactive):
         # Choose sprite based on orientation and state
-        if self.orientation == 'H':
-            img = self.deactive_H if is_deactive else self.active_H
-        else:
-            img = self.deactive_V if is_deactive else self.active_V
+        img = self.base_sprite(orientation, is_deactive)
 
         # Scale the sprite to fit the grid
-        if self.orientation == 'H':
+        if orientation == 'H':
             width = CELL_SIZE * self.size - MARGIN
             height = CELL_SIZE - MARGIN
         else:
             width = CELL_SIZE - MARGIN
             height = CELL_SIZE * self.size - MARGIN
 
-        return pygame.transform.scale(img, (width, height))
+        return pygame.transform.scale(img, (width, height)).convert_alpha()
+
+    def get_segment(self, i, is_deactive=False):
+        """ One grid cell's worth of the ship sprite. """
+        orientation = self.orientation
+
+        def build():
+            sprite = self.get_sprite(is_deactive)
+            # Crop the sprite to this segment
+            cropped = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
+            if orientation == 'H':
+                cropped.blit(sprite, (0, 0), (i * (CELL_SIZE + MARGIN), 0, CELL_SIZE, CELL_SIZE))
+            else:
+                cropped.blit(sprite, (0, 0), (0, i * (CELL_SIZE + MARGIN), CELL_SIZE, CELL_SIZE))
+            return cropped
+
+        return self.cached((orientation, is_deactive, i), build)
+
+    def get_status_sprite(self, is_damaged):
+        # Always use the horizontal sprite, regardless of ship orientation
+        return self.cached(("status", is_damaged), lambda: pygame.transform.scale(
+            self.base_sprite('H', is_damaged), (CELL_SIZE * self.size + 10, CELL_SIZE + 10)))
+
+# Animation frames are shared by every Animation of the same type
+ANIMATION_FRAMES = {}
+
+def load_animation_frames(anim_type):
+    if anim_type not in ANIMATION_FRAMES:
+        if anim_type == "explosion":
+            frames = [pygame.image.load(f"../assets/Animations/fire1_ {i:03}.png") for i in range(13)]
+        else:
+            frames = [pygame.image.load("../assets/Animations/splash.png")]
+        ANIMATION_FRAMES[anim_type] = [pygame.transform.scale(frame, (CELL_SIZE, CELL_SIZE)) for frame in frames]
+    return ANIMATION_FRAMES[anim_type]
+
+# Logic runs in fixed steps at the game's nominal frame rate, whatever the real frame rate
+GAME_STEP_MS = 1000 / 30
+ANIMATION_FRAME_MS = 100
 
 class Animation:
     def __init__(self, pos, anim_type, board_type):
         self.pos = pos
         self.frame = 0
         self.type = anim_type
-        self.last_update = pygame.time.get_ticks()
+        self.elapsed = 0  # Simulated time since the animation started, in ms
         self.board_type = board_type
+        self.frames = load_animation_frames(anim_type)
 
-        if anim_type == "explosion":
-            self.frames = [pygame.image.load(f"../assets/Animations/fire1_ {i:03}.png") for i in range(13)]
-        else:
-            self.frames = [pygame.image.load("../assets/Animations/splash.png")]
+    def update(self, step_ms):
+        self.elapsed += step_ms
+        self.frame = int(self.elapsed // ANIMATION_FRAME_MS)
+
+    @property
+    def finished(self):
+        return self.frame >= len(self.frames)
 
-        self.frames = [pygame.transform.scale(frame, (CELL_SIZE, CELL_SIZE)) for frame in self.frames]
+
+def update_animations(state, step_ms):
+    for anim in state.animations:
+        anim.update(step_ms)
+    state.animations = [anim for anim in state.animations if not anim.finished]
 
 class GameState:
     def __init__(self):
+        self.stream = None  # Optional spectator publisher, see spectator.py
+        self.turns = None  # Optional undo/redo history, see turn_history.py
+        self.shot_analytics = None  # Optional player shot statistics, see shot_analytics.py
         self.player_board = [[None] * GRID_SIZE for _ in range(GRID_SIZE)]
         self.ai_board = [[None] * GRID_SIZE for _ in range(GRID_SIZE)]
         self.player_hits = [[0] * GRID_SIZE for _ in range(GRID_SIZE)]
@@ -133,16 +245,26 @@ class GameState:
         if self.fog_active:
             self.generate_fog()
         self.probability_map = [[0] * GRID_SIZE for _ in range(GRID_SIZE)]
+        self.book_symmetry = opening_book.random_symmetry()  # How the AI's opening book is turned this match
+
+    def emit(self, kind, *args):
+        # Forward a state change to the spectator stream and turn history, if attached
+        if self.stream is not None:
+            self.stream.publish(kind, *args)
+        if self.turns is not None:
+            self.turns.record(kind, *args)
 
     def generate_fog(self):
         if not self.fog_active:
             return
+        previous = set(self.fog_positions)
         self.fog_positions.clear()
         num_clusters = random.randint(1, 3)
         for _ in range(num_clusters):
             cluster_size = random.randint(*FOG_SIZE)
             start_x, start_y = random.randint(0, GRID_SIZE - 1), random.randint(0, GRID_SIZE - 1)
             self.expand_fog_cluster(start_x, start_y, cluster_size)
+        self.emit("fog", self.fog_positions - previous, previous - self.fog_positions)
 
     def expand_fog_cluster(self, x, y, size):
         directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
@@ -163,51 +285,104 @@ class GameState:
     def remove_fog(self, x, y):
         if (x, y) in self.fog_positions:
             self.fog_positions.remove((x, y))
+            self.emit("fog", set(), {(x, y)})
+
+    def set_phase(self, phase):
+        self.game_phase = phase
+        self.emit("phase", phase)
 
     def reset(self):
+        stream, turns, shot_analytics = self.stream, self.turns, self.shot_analytics
         self.__init__()
+        self.shot_analytics = shot_analytics
         self.place_ai_ships()
+        self.stream, self.turns = stream, turns
+        self.emit("reset")
 
     def place_ai_ships(self):
-        for ship in self.ships:
-            placed = False
-            while not placed:
-                row = random.randint(0, GRID_SIZE - 1)
-                col = random.randint(0, GRID_SIZE - 1)
-                orientation = random.choice(['H', 'V'])
-
-                if self.validate_ship_placement(row, col, ship.size, orientation, ai=True):
-                    for i in range(ship.size):
-                        if orientation == 'H':
-                            self.ai_board[row][col + i] = ship
-                        else:
-                            self.ai_board[row + i][col] = ship
-                    placed = True
+        # Use a precomputed low-risk layout when one has been built for this fleet
+        sizes = [ship.size for ship in self.ships]
+        pool = [] if NO_TOUCH else placement_heatmap.load_layout_pool(GRID_SIZE, sizes)
+
+        def candidate():
+            if pool:
+                return placement_heatmap.transform_layout(random.choice(pool), GRID_SIZE, sizes)
+            # Raises fleet_solver.PlacementError straight away for a fleet that can't fit
+            return fleet_solver.solve_fleet(GRID_SIZE, sizes, NO_TOUCH)
+
+        # Once enough matches are known, keep clear of the cells players like to open with
+        heatmap = self.shot_analytics.early_heatmap() if self.shot_analytics is not None else None
+        if heatmap is None:
+            layout = candidate()
+        else:
+            layout = min((candidate() for _ in range(PLACEMENT_CANDIDATES)),
+                         key=lambda layout: layout_exposure(layout, heatmap, GRID_SIZE, sizes))
+
+        for ship, (row, col, orientation) in zip(self.ships, layout):
+            for i in range(ship.size):
+                if orientation == 'H':
+                    self.ai_board[row][col + i] = ship
+                else:
+                    self.ai_board[row + i][col] = ship
 
     def validate_ship_placement(self, row, col, size, orientation, ai=False):
         board = self.ai_board if ai else self.player_board
         if orientation == 'H':
             if col + size > GRID_SIZE:
                 return False
-            return all(board[row][col + i] is None for i in range(size))
+            if not all(board[row][col + i] is None for i in range(size)):
+                return False
         else:
             if row + size > GRID_SIZE:
                 return False
-            return all(board[row + i][col] is None for i in range(size))
+            if not all(board[row + i][col] is None for i in range(size)):
+                return False
+        if NO_TOUCH:
+            height, width = (1, size) if orientation == 'H' else (size, 1)
+            return all(board[y][x] is None
+                       for y in range(max(row - 1, 0), min(row + height + 1, GRID_SIZE))
+                       for x in range(max(col - 1, 0), min(col + width + 1, GRID_SIZE)))
+        return True
 
     def update_probability_map(self):
-        self.probability_map = [[0] * GRID_SIZE for _ in range(GRID_SIZE)]
-        for y in range(GRID_SIZE):
-            for x in range(GRID_SIZE):
-                if self.ai_hits[y][x] == 2:
-                    for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                        nx, ny = x + dx, y + dy
-                        if 0 <= nx < GRID_SIZE and 0 <= ny < GRID_SIZE and self.ai_hits[ny][nx] == 0:
-                            self.probability_map[ny][nx] += 10
+        self.probability_map = compute_probability_map(self.ai_hits)
+
+
+def compute_probability_map(hits):
+    probability_map = [[0] * GRID_SIZE for _ in range(GRID_SIZE)]
+    for y in range(GRID_SIZE):
+        for x in range(GRID_SIZE):
+            if hits[y][x] == 2:
+                for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                    nx, ny = x + dx, y + dy
+                    if 0 <= nx < GRID_SIZE and 0 <= ny < GRID_SIZE and hits[ny][nx] == 0:
+                        probability_map[ny][nx] += HIT_WEIGHT
+                        # The hit behind this one means we're following a ship's line
+                        bx, by = x - dx, y - dy
+                        if 0 <= bx < GRID_SIZE and 0 <= by < GRID_SIZE and hits[by][bx] == 2:
+                            probability_map[ny][nx] += LINE_BONUS
+    return probability_map
+
+
+# Miss/hit markers and the fog tile, drawn once and blitted per cell
+CELL_MARKERS = {}
+
+def get_cell_markers():
+    if not CELL_MARKERS:
+        center = (CELL_SIZE // 2, CELL_SIZE // 2)
+        miss = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(miss, MISS_COLOR, center, CELL_SIZE // 4)
+        hit = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(hit, HIT_COLOR, center, CELL_SIZE // 2)
+        fog = pygame.Surface((CELL_SIZE, CELL_SIZE))
+        fog.fill(FOG_COLOR)
+        CELL_MARKERS.update(miss=miss, hit=hit, fog=fog)
+    return CELL_MARKERS
 
 
 # 3. Updated draw_grid function
-def draw_grid(screen, offset_x, reveal_ships=False, board=None, hits=None, fog_positions=set(), fog_active=False):
+def draw_grid(canvas, offset_x, reveal_ships=False, board=None, hits=None, fog_positions=set(), fog_active=False):
+    markers = get_cell_markers()
     # Draw base grid with lines
     for row in range(GRID_SIZE):
         for col in range(GRID_SIZE):
@@ -218,20 +393,18 @@ def draw_grid(screen, offset_x, reveal_ships=False, board=None, hits=None, fog_p
                 CELL_SIZE,
                 CELL_SIZE
             )
-            pygame.draw.rect(screen, OCEAN, rect)
+            canvas.draw_rect(OCEAN, rect)
 
             if hits:
                 if hits[row][col] == 1:
-                    pygame.draw.circle(screen, MISS_COLOR, rect.center, CELL_SIZE // 4)
+                    canvas.blit(markers["miss"], rect.topleft)
                 elif hits[row][col] == 2:
-                    pygame.draw.circle(screen, HIT_COLOR, rect.center, CELL_SIZE // 2)
+                    canvas.blit(markers["hit"], rect.topleft)
 
             if fog_active and (col, row) in fog_positions:
-                fog_surface = pygame.Surface((CELL_SIZE, CELL_SIZE))
-                fog_surface.fill(FOG_COLOR)
-                screen.blit(fog_surface, rect.topleft)
+                canvas.blit(markers["fog"], rect.topleft)
             # Grid lines
-            pygame.draw.rect(screen, GRID_LINE, rect, 1)
+            canvas.draw_rect(GRID_LINE, rect, 1)
 
     # Draw complete ships
     if reveal_ships and board:
@@ -249,79 +422,50 @@ def draw_grid(screen, offset_x, reveal_ships=False, board=None, hits=None, fog_p
                     # Draw each segment of the ship
                     for i in range(ship.size):
                         if ship.orientation == 'H':
-                            segment_rect = pygame.Rect(
-                                start_x + i * (CELL_SIZE + MARGIN),
-                                start_y,
-                                CELL_SIZE,
-                                CELL_SIZE
-                            )
+                            segment_pos = (start_x + i * (CELL_SIZE + MARGIN), start_y)
+                            hit_row, hit_col = ship.row, ship.col + i
                         else:
-                            segment_rect = pygame.Rect(
-                                start_x,
-                                start_y + i * (CELL_SIZE + MARGIN),
-                                CELL_SIZE,
-                                CELL_SIZE
-                            )
+                            segment_pos = (start_x, start_y + i * (CELL_SIZE + MARGIN))
+                            hit_row, hit_col = ship.row + i, ship.col
 
                         # Check if this segment is hit
-                        if ship.orientation == 'H':
-                            hit_row = ship.row
-                            hit_col = ship.col + i
-                        else:
-                            hit_row = ship.row + i
-                            hit_col = ship.col
+                        is_hit = bool(hits) and hits[hit_row][hit_col] == 2
+                        canvas.blit(ship.get_segment(i, is_deactive=is_hit), segment_pos)
 
-                        is_hit = hits and hits[hit_row][hit_col] == 2
-                        segment_sprite = ship.get_sprite(is_deactive=is_hit)
 
-                        # Ensure proper transparency handling
-                        segment_sprite = segment_sprite.convert_alpha()
-
-                        # Crop the sprite to this segment
-                        cropped = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-                        if ship.orientation == 'H':
-                            cropped.blit(segment_sprite, (0, 0), (i * (CELL_SIZE + MARGIN), 0, CELL_SIZE, CELL_SIZE))
-                        else:
-                            cropped.blit(segment_sprite, (0, 0), (0, i * (CELL_SIZE + MARGIN), CELL_SIZE, CELL_SIZE))
-
-                        screen.blit(cropped, segment_rect)
 
+def placement_is_valid(state, cell):
+    """ Whether the current ship fits with its top-left end on cell (x, y). """
+    if cell is None or state.current_ship >= len(state.ships):
+        return False
+    ship = state.ships[state.current_ship]
+    col, row = cell
+    if ship.orientation == 'H':
+        valid = col + ship.size <= GRID_SIZE
+    else:
+        valid = row + ship.size <= GRID_SIZE
+    return valid and state.validate_ship_placement(row, col, ship.size, ship.orientation)
 
 
-def handle_placement_phase(screen, state, mouse_pos):
+def place_current_ship(state, row, col):
     ship = state.ships[state.current_ship]
-    col = (mouse_pos[0] - PLAYER_OFFSET) // (CELL_SIZE + MARGIN)
-    row = (mouse_pos[1] - PLAYER_OFFSET) // (CELL_SIZE + MARGIN)
-
-    valid = False
-    if 0 <= col < GRID_SIZE and 0 <= row < GRID_SIZE:
+    ship.row = row  # Update the ship's row
+    ship.col = col  # Update the ship's column
+    for i in range(ship.size):
         if ship.orientation == 'H':
-            valid = col + ship.size <= GRID_SIZE
+            state.player_board[row][col + i] = ship
         else:
-            valid = row + ship.size <= GRID_SIZE
-
-        if valid:
-            valid = state.validate_ship_placement(row, col, ship.size, ship.orientation)
+            state.player_board[row + i][col] = ship
+    state.current_ship += 1
+    state.emit("place", state.current_ship - 1, row, col, ship.orientation)
+    if state.current_ship >= len(state.ships):
+        state.set_phase("playing")
 
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
 
-        if event.type == pygame.MOUSEBUTTONDOWN and valid:
-            ship.row = row  # Update the ship's row
-            ship.col = col  # Update the ship's column
-            for i in range(ship.size):
-                if ship.orientation == 'H':
-                    state.player_board[row][col + i] = ship
-                else:
-                    state.player_board[row + i][col] = ship
-            state.current_ship += 1
-            if state.current_ship >= len(state.ships):
-                state.game_phase = "playing"
-
-        if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-            ship.orientation = 'V' if ship.orientation == 'H' else 'H'
+def handle_placement_phase(canvas, state, cell):
+    """ Draws the preview of the current ship at the hovered cell. """
+    valid = placement_is_valid(state, cell)
+    col, row = cell if cell else (-1, -1)
 
     # Inside handle_placement_phase's preview code:
     if valid and state.current_ship < len(state.ships):
@@ -340,48 +484,137 @@ def handle_placement_phase(screen, state, mouse_pos):
             preview_width,
             preview_height
         )
-        screen.blit(ship.get_sprite(), preview_rect)
+        canvas.blit(ship.get_sprite(), preview_rect)
 
     return row, col, valid
 
 
-def ai_turn(state):
+# Shared by every game so its transposition table carries over between turns
+ENDGAME_SOLVER = EndgameSolver()
+
+
+def choose_ai_targets(state, cancel_event=None):
+    """ Decides this turn's AI shots without touching the game state.
+
+    Works on private copies of the hit grid and probability map, so it is safe to
+    run on the AI worker thread while the main loop keeps drawing.
+    """
+    hits = [row[:] for row in state.ai_hits]
+    probability_map = [row[:] for row in state.probability_map]
+
     # Randomly determine number of shots (1-3) with weighted probabilities
     num_shots = random.choice(AI_SHOT_OPTIONS)
+    targets = []
+    fleet_sizes = [size for size, _, _ in SHIPS.values()]
+    book = opening_book.load_opening_book(GRID_SIZE, fleet_sizes, state.book_symmetry)
+    deadline = ENDGAME_SOLVER.turn_deadline()  # Shared by every shot of the volley
 
     for _ in range(num_shots):
-        target = None
+        if cancel_event is not None and cancel_event.is_set():
+            break
+
         candidates = []
 
+        # Endgame: few ship cells left, so search the remaining layouts exactly
+        endgame_shot = ENDGAME_SOLVER.best_shot(hits, GRID_SIZE, fleet_sizes, cancel_event, deadline)
+        if endgame_shot is not None:
+            candidates = [endgame_shot]
+
         # Look for high-probability targets first
-        max_prob = max(max(row) for row in state.probability_map)
-        if max_prob > 0:
+        max_prob = max(max(row) for row in probability_map)
+        if not candidates and max_prob > 0:
             candidates = [(x, y) for y in range(GRID_SIZE) for x in range(GRID_SIZE)
-                          if state.probability_map[y][x] == max_prob and state.ai_hits[y][x] == 0]
+                          if probability_map[y][x] == max_prob and hits[y][x] == 0]
+
+        # No hits to chase yet: follow the precomputed opening book
+        if not candidates:
+            book_shot = opening_book.next_book_shot(book, hits)
+            if book_shot is not None:
+                candidates = [book_shot]
 
         # Fallback to random valid target if no high-prob targets
         if not candidates:
             candidates = [(x, y) for y in range(GRID_SIZE) for x in range(GRID_SIZE)
-                          if state.ai_hits[y][x] == 0]
+                          if hits[y][x] == 0]
 
         if not candidates:
             break  # No valid targets left
 
-        target = random.choice(candidates)
-        x, y = target
-
-        # Process the attack
-        if state.player_board[y][x] is not None:
-            state.ai_hits[y][x] = 2
-            state.animations.append(Animation((x, y), "explosion", "player"))
-            explosion_sound.play()
-        else:
-            state.ai_hits[y][x] = 1
-            state.animations.append(Animation((x, y), "splash", "player"))
-            splash_sound.play()
+        x, y = random.choice(candidates)
+        targets.append((x, y))
 
         # Update probability after each shot
-        state.update_probability_map()
+        hits[y][x] = 2 if state.player_board[y][x] is not None else 1
+        probability_map = compute_probability_map(hits)
+
+    return targets
+
+
+def fallback_ai_targets(state):
+    """ Single random shot used when the AI runs out of its time budget. """
+    candidates = [(x, y) for y in range(GRID_SIZE) for x in range(GRID_SIZE)
+                  if state.ai_hits[y][x] == 0]
+    return [random.choice(candidates)] if candidates else []
+
+
+def apply_player_shot(state, x, y):
+    if state.ai_board[y][x] is not None:
+        state.player_hits[y][x] = 2
+        state.emit("shot", "ai", x, y, 2)
+        state.animations.append(Animation((x, y), "explosion", "ai"))
+        audio.play("explosion")
+    else:
+        state.player_hits[y][x] = 1
+        state.emit("shot", "ai", x, y, 1)
+        state.animations.append(Animation((x, y), "splash", "ai"))
+        audio.play("splash")
+
+    state.player_turn = False
+    state.generate_fog()  # Refresh fog after turn
+
+
+def pick_hint_positions(state):
+    # Find all available positions
+    all_positions = [(x, y) for y in range(GRID_SIZE) for x in range(GRID_SIZE)
+                     if state.player_hits[y][x] == 0]
+    ship_positions = [(x, y) for x, y in all_positions if state.ai_board[y][x] is not None]
+    non_ship_positions = [(x, y) for x, y in all_positions if state.ai_board[y][x] is None]
+
+    # Ensure one position has a ship
+    hint_positions = []
+    if len(ship_positions) >= 1:
+        hint_positions.append(random.choice(ship_positions))
+
+    # Add two random non-ship positions
+    if len(non_ship_positions) >= 2:
+        hint_positions += random.sample(non_ship_positions, 2)
+    elif len(non_ship_positions) == 1:
+        hint_positions.append(non_ship_positions[0])
+
+    # Shuffle to randomize the order of the hint positions
+    random.shuffle(hint_positions)
+    return hint_positions
+
+
+def apply_ai_shot(state, x, y):
+    # Process the attack
+    if state.player_board[y][x] is not None:
+        state.ai_hits[y][x] = 2
+        state.emit("shot", "player", x, y, 2)
+        state.animations.append(Animation((x, y), "explosion", "player"))
+        audio.play("explosion")
+    else:
+        state.ai_hits[y][x] = 1
+        state.emit("shot", "player", x, y, 1)
+        state.animations.append(Animation((x, y), "splash", "player"))
+        audio.play("splash")
+
+    state.update_probability_map()
+
+
+def ai_turn(state):
+    for x, y in choose_ai_targets(state):
+        apply_ai_shot(state, x, y)
 
 def check_victory(hits, board):
     for y in range(GRID_SIZE):
@@ -392,14 +625,23 @@ def check_victory(hits, board):
 
 import pygame
 
-def draw_ship_status(screen, state):
+# Rendered text, keyed by font and string, so unchanged labels aren't re-rendered every frame
+TEXT_CACHE = {}
+
+def render_text(font, text, color=TEXT_COLOR):
+    key = (font, text, color)
+    if key not in TEXT_CACHE:
+        TEXT_CACHE[key] = font.render(text, True, color)
+    return TEXT_CACHE[key]
+
+def draw_ship_status(canvas, state):
     """ Draws the ship status below the grid with correct colors, displaying only horizontal ship images. """
     status_x = PLAYER_OFFSET
     status_y = PLAYER_OFFSET + GRID_SIZE * (CELL_SIZE + MARGIN) + 50  # Move further below the grid
 
     # Draw the status label
-    text = FONT.render("Player | Damaged Ships Status:", True, TEXT_COLOR)
-    screen.blit(text, (status_x, status_y))
+    text = render_text(FONT, "Player | Damaged Ships Status:")
+    canvas.blit(text, (status_x, status_y))
 
     # Draw the ships below the label
     offset_x = 120  # Start position after "Damaged Ships Status:" text
@@ -413,229 +655,265 @@ def draw_ship_status(screen, state):
             if state.player_board[row][col] == ship
         )
 
-        # Always use the horizontal sprite, regardless of ship orientation
-        ship_sprite = ship.active_H if not damage_status else ship.deactive_H
-        # Scale the ship sprite to be larger
-        scaled_width = CELL_SIZE * ship.size + 10
-        scaled_height = CELL_SIZE + 10
-        ship_sprite = pygame.transform.scale(ship_sprite, (scaled_width, scaled_height))
-        ship_rect = pygame.Rect(status_x + offset_x, status_y, scaled_width, scaled_height)
-        screen.blit(ship_sprite, ship_rect)
-
-        offset_x += scaled_width + 20  # Space out the ships more
-
-
-def main_game(difficulty, screen_mode):
-    pygame.init()
+        # Larger horizontal sprite, scaled once per ship
+        ship_sprite = ship.get_status_sprite(damage_status)
+        canvas.blit(ship_sprite, (status_x + offset_x, status_y))
+
+        offset_x += ship_sprite.get_width() + 20  # Space out the ships more
+
+
+# Side buttons on the playing screen
+HINT_BUTTON = pygame.Rect(SCREEN_WIDTH - 220, 210, 120, 40)
+EXIT_BUTTON = pygame.Rect(SCREEN_WIDTH - 220, 280, 120, 40)
+
+def draw_playing_phase(canvas, state, hint_uses, hint_positions):
+    """ Draws both boards, ship status, buttons, animations and any active hint cells. """
+    draw_grid(canvas, PLAYER_OFFSET, reveal_ships=True, board=state.player_board, hits=state.ai_hits)
+    draw_grid(canvas, AI_OFFSET, hits=state.player_hits, fog_positions=state.fog_positions, fog_active=state.fog_active)
+
+    draw_ship_status(canvas, state)
+    # Draw hint button, quit button
+    canvas.draw_rect((0, 150, 255), HINT_BUTTON)
+    button_text = render_text(FONT, f"Hints: {hint_uses}")
+    canvas.blit(button_text, (SCREEN_WIDTH - 200, 220))
+
+    canvas.draw_rect((0, 150, 255), EXIT_BUTTON)
+    button_text = render_text(FONT, "Quit")
+    canvas.blit(button_text, (SCREEN_WIDTH - 185, 290))
+
+    # Animations only advance in update_animations; drawing just shows the current frame
+    for anim in state.animations:
+        frame = anim.frames[min(anim.frame, len(anim.frames) - 1)]
+        canvas.blit(frame, (
+            (AI_OFFSET if anim.board_type == "ai" else PLAYER_OFFSET) + anim.pos[0] * (CELL_SIZE + MARGIN),
+            PLAYER_OFFSET + anim.pos[1] * (CELL_SIZE + MARGIN)
+        ))
+
+    # If hint is active, highlight hint positions
+    for x, y in hint_positions:
+        canvas.draw_rect(HIGHLIGHT, (
+            AI_OFFSET + x * (CELL_SIZE + MARGIN),
+            PLAYER_OFFSET + y * (CELL_SIZE + MARGIN),
+            CELL_SIZE,
+            CELL_SIZE
+        ), 3)
+
+
+def draw_difficulty_label(canvas, difficulty, fog_active, max_ai_shots):
+    # Built from the settings in effect, which tuned presets may change per difficulty
+    fog = "Active" if fog_active else "Inactive"
+    multishot = "Active" if max_ai_shots > 1 else "Inactive"
+    turn_text = render_text(FONT, f"Difficulty: {difficulty.capitalize()} | Fog: {fog} | Enemy MultiShot: {multishot}")
+    canvas.blit(turn_text, (20, 20))
+
+
+def record_match(history, state, difficulty, duration, ai_think_ms):
+    # Queued for the history's writer thread; nothing here touches the disk
+    history.record(Match(
+        difficulty=difficulty,
+        won=state.player_score > 0,
+        shots=sum(1 for row in state.player_hits for hit in row if hit),
+        hints_used=MAX_HINTS - state.hint_uses,
+        duration=duration,
+        ai_think_ms=ai_think_ms,
+    ))
+
+
+def main_game(scenes, difficulty, practice=False):
+    """ Game scene. Returns the menu scene when the player quits the match.
+
+    Practice matches can be undone turn by turn, so they aren't logged to the match
+    history or the shot statistics.
+    """
     set_difficulty(difficulty)
+    scenes.play_music("../assets/Sounds/valkyries.mid")
 
-    # Load and play background music
-    pygame.mixer.music.load("../assets/Sounds/valkyries.mid")  # Change this to your actual file path
-    pygame.mixer.music.set_volume(0.5)  # Adjust volume (0.0 to 1.0)
-    pygame.mixer.music.play(-1)  # Play in an infinite loop
-
-    is_fullscreen = (screen_mode == pygame.FULLSCREEN)
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT),
-                                     pygame.FULLSCREEN if is_fullscreen else pygame.RESIZABLE)
+    is_fullscreen = scenes.fullscreen
     pygame.display.set_caption("Battleship Wars")
-    clock = pygame.time.Clock()
+    clock = scenes.clock
+    canvas = create_backend(scenes.screen, "Battleship Wars", fullscreen=is_fullscreen)
+
+    history = None if practice else scenes.history
+    analytics = None if practice else scenes.analytics
 
     state = GameState()
+    state.shot_analytics = scenes.analytics  # Read for placement in practice matches too
     state.place_ai_ships()
+    if analytics is not None:
+        analytics.start_game()
+    if practice:
+        state.turns = TurnHistory(state)
+    ai_worker = scenes.create_ai_worker()
+    match_started = time.perf_counter()
+    publisher = scenes.publisher
+    if publisher is not None:
+        publisher.attach(state, difficulty)  # Broadcast this match to spectators
 
-    hint_uses = MAX_HINTS  # Hint counter
     hint_active = False
     hint_positions = []
 
+    # Single input dispatcher: pixel -> cell tables are built once, every input is timestamped
+    cells = CellLookup({"player": PLAYER_OFFSET, "ai": AI_OFFSET}, PLAYER_OFFSET,
+                       GRID_SIZE, CELL_SIZE + MARGIN, SCREEN_WIDTH, SCREEN_HEIGHT)
+    latency = LatencyTracker()
+    timestep = FixedTimestep(GAME_STEP_MS)
+    elapsed = 0
+
     while True:
-        current_time = pygame.time.get_ticks()
-        screen.fill(OCEAN)
-        mouse_pos = pygame.mouse.get_pos()
+        latency.polled()
+        for event in scenes.get_events():
+            stamp = latency.stamp()
+
+            if event.type == pygame.QUIT:
+                ai_worker.shutdown()
+                if LATENCY_REPORT:
+                    print(latency.report())
+                pygame.quit()
+                sys.exit()
+
+            if event.type == pygame.KEYDOWN:
+                # Toggle fullscreen when pressing 'F'
+                if event.key == pygame.K_f:
+                    is_fullscreen = not is_fullscreen  # Toggle fullscreen state
+                    canvas.set_fullscreen(is_fullscreen)
+                    latency.mark(stamp, "fullscreen")
+                # Rotate the ship being placed
+                elif event.key == pygame.K_SPACE and state.game_phase == "setup":
+                    ship = state.ships[state.current_ship]
+                    ship.orientation = 'V' if ship.orientation == 'H' else 'H'
+                    latency.mark(stamp, "rotate")
+                # Undo/redo whole turns in practice matches, only while it's the player's move
+                elif event.key in (pygame.K_z, pygame.K_y) and state.turns is not None \
+                        and state.game_phase == "playing" and state.player_turn and not ai_worker.busy:
+                    moved = state.turns.undo() if event.key == pygame.K_z else state.turns.redo()
+                    if moved:
+                        hint_active = False
+                        latency.mark(stamp, "undo")
+
+            if event.type != pygame.MOUSEBUTTONDOWN:
+                continue
+
+            if state.game_phase == "setup":
+                cell = cells.cell_at("player", event.pos)
+                if placement_is_valid(state, cell):
+                    place_current_ship(state, cell[1], cell[0])
+                    latency.mark(stamp, "place")
+
+            elif state.game_phase == "playing":
+                if EXIT_BUTTON.collidepoint(event.pos):
+                    print("Quitting game...")
+                    ai_worker.shutdown()  # Drop any turn the AI is still thinking about
+                    if LATENCY_REPORT:
+                        print(latency.report())
+                    canvas.close()
+                    if canvas.name == "surface":
+                        scenes.screen, scenes.fullscreen = canvas.to_surface(), is_fullscreen
+                    else:
+                        # The texture backend hid the display window, so its old surface can't be reused
+                        scenes.reset_display(is_fullscreen)
+                    return menu.main_menu, {}
+
+                # Board is locked while the AI is thinking
+                if not state.player_turn:
+                    continue
+
+                # If clicking the hint button
+                if HINT_BUTTON.collidepoint(event.pos):
+                    if state.hint_uses > 0 and not hint_active:
+                        hint_active = True
+                        state.hint_uses -= 1
+                        hint_positions = pick_hint_positions(state)
+                        state.emit("hint", hint_positions)
+                        if analytics is not None:
+                            analytics.record_hint()
+                        latency.mark(stamp, "hint")
+                    continue
+
+                # Attack the AI board; while a hint is showing, only its cells can be fired at
+                cell = cells.cell_at("ai", event.pos)
+                if hint_active and cell not in hint_positions:
+                    continue
+                if cell is not None and state.player_hits[cell[1]][cell[0]] == 0:
+                    hinted, hint_active = hint_active, False
+                    apply_player_shot(state, *cell)
+                    if analytics is not None:
+                        analytics.record_shot(*cell, state.ai_board[cell[1]][cell[0]] is not None, hinted)
+                    latency.mark(stamp, "shot")
+
+        for _ in range(timestep.advance(elapsed)):
+            update_animations(state, GAME_STEP_MS)
+        if publisher is not None:
+            publisher.admit_waiting()  # Spectators who connected since the last frame
+
+        canvas.fill(OCEAN)
 
         if state.game_phase == "setup":
-            draw_grid(screen, PLAYER_OFFSET, reveal_ships=True, board=state.player_board)
-            row, col, valid = handle_placement_phase(screen, state, mouse_pos)
+            draw_grid(canvas, PLAYER_OFFSET, reveal_ships=True, board=state.player_board)
+            handle_placement_phase(canvas, state, cells.cell_at("player", scenes.mouse_pos()))
 
             # Draw current ship info
             if state.current_ship < len(state.ships):
                 ship = state.ships[state.current_ship]
-                text = FONT.render(f"Placing: {ship.name} ({ship.size} cells)", True, TEXT_COLOR)
-                screen.blit(text, (SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT-100))
+                text = render_text(FONT, f"Placing: {ship.name} ({ship.size} cells)")
+                canvas.blit(text, (SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT-100))
 
         elif state.game_phase == "playing":
-            draw_grid(screen, PLAYER_OFFSET, reveal_ships=True, board=state.player_board, hits=state.ai_hits)
-            draw_grid(screen, AI_OFFSET, hits=state.player_hits, fog_positions=state.fog_positions, fog_active=state.fog_active)
-
-            draw_ship_status(screen, state)
-            # Draw hint button, quit button
-            hint_button = pygame.Rect(SCREEN_WIDTH - 220, 210, 120, 40)
-            pygame.draw.rect(screen, (0, 150, 255), hint_button)
-            button_text = FONT.render(f"Hints: {hint_uses}", True, TEXT_COLOR)
-            screen.blit(button_text, (SCREEN_WIDTH - 200, 220))
-
-            exit_button = pygame.Rect(SCREEN_WIDTH - 220, 280, 120, 40)
-            pygame.draw.rect(screen, (0, 150, 255), exit_button)
-            button_text = FONT.render(f"Quit", True, TEXT_COLOR)
-            screen.blit(button_text, (SCREEN_WIDTH - 185, 290))
-
-            # Handle animations
-            for anim in state.animations[:]:
-                frame = anim.frames[min(anim.frame, len(anim.frames) - 1)]
-                screen.blit(frame, (
-                    (AI_OFFSET if anim.board_type == "ai" else PLAYER_OFFSET) + anim.pos[0] * (CELL_SIZE + MARGIN),
-                    PLAYER_OFFSET + anim.pos[1] * (CELL_SIZE + MARGIN)
-                ))
-                if pygame.time.get_ticks() - anim.last_update > 100:
-                    anim.frame += 1
-                    anim.last_update = pygame.time.get_ticks()
-                    if anim.frame >= len(anim.frames):
-                        state.animations.remove(anim)
-
-            # If hint is active, highlight hint positions
-            if hint_active:
-                for x, y in hint_positions:
-                    pygame.draw.rect(screen, HIGHLIGHT, (
-                        AI_OFFSET + x * (CELL_SIZE + MARGIN),
-                        PLAYER_OFFSET + y * (CELL_SIZE + MARGIN),
-                        CELL_SIZE,
-                        CELL_SIZE
-                    ), 3)
-
-            # Handle player input
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-
-                # Toggle fullscreen when pressing 'F'
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_f:
-                        is_fullscreen = not is_fullscreen  # Toggle fullscreen state
-                        if is_fullscreen:
-                            screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN)
-                        else:
-                            screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
-
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    mx, my = event.pos
-
-                    grid_x = (mx - AI_OFFSET) // (CELL_SIZE + MARGIN)
-                    grid_y = (my - PLAYER_OFFSET) // (CELL_SIZE + MARGIN)
-
-                    if 0 <= grid_x < GRID_SIZE and 0 <= grid_y < GRID_SIZE:
-                        state.player_hits[grid_y][grid_x] = 2 if state.ai_board[grid_y][grid_x] else 1
-                        state.player_turn = False
-                        state.generate_fog()  # Refresh fog after turn
-
-                    if exit_button.collidepoint(mx, my):
-                        print("Quitting game...")
-                        menu.main_menu(screen)
-                        pygame.mixer.music.pause()  # Pauses music
-                        return  # Exit the menu function without quitting pygame
-
-                    # If clicking the hint button
-                    if hint_button.collidepoint(mx, my) and hint_uses > 0 and not hint_active:
-                        hint_active = True
-                        hint_uses -= 1
-
-                        # Find all available positions
-                        all_positions = [(x, y) for y in range(GRID_SIZE) for x in range(GRID_SIZE)
-                                         if state.player_hits[y][x] == 0]
-                        ship_positions = [(x, y) for x, y in all_positions if state.ai_board[y][x] is not None]
-                        non_ship_positions = [(x, y) for x, y in all_positions if state.ai_board[y][x] is None]
-
-                        # Ensure one position has a ship
-                        hint_positions = []
-                        if len(ship_positions) >= 1:
-                            hint_positions.append(random.choice(ship_positions))
-
-                        # Add two random non-ship positions
-                        if len(non_ship_positions) >= 2:
-                            hint_positions += random.sample(non_ship_positions, 2)
-                        elif len(non_ship_positions) == 1:
-                            hint_positions.append(non_ship_positions[0])
-
-                        # Shuffle to randomize the order of the hint positions
-                        random.shuffle(hint_positions)
-
-
-                    # If clicking a hint position
-                    elif hint_active:
-                        grid_x = (mx - AI_OFFSET) // (CELL_SIZE + MARGIN)
-                        grid_y = (my - PLAYER_OFFSET) // (CELL_SIZE + MARGIN)
-
-                        if (grid_x, grid_y) in hint_positions:
-                            if state.ai_board[grid_y][grid_x] is not None:
-                                state.player_hits[grid_y][grid_x] = 2
-                                state.animations.append(Animation((grid_x, grid_y), "explosion", "ai"))
-                                explosion_sound.play()
-                            else:
-                                state.player_hits[grid_y][grid_x] = 1
-                                state.animations.append(Animation((grid_x, grid_y), "splash", "ai"))
-                                splash_sound.play()
-
-                            hint_active = False
-                            state.player_turn = False
-
-                    # If normally clicking to attack AI board
-                    elif not hint_active:
-                        grid_x = (mx - AI_OFFSET) // (CELL_SIZE + MARGIN)
-                        grid_y = (my - PLAYER_OFFSET) // (CELL_SIZE + MARGIN)
-
-                        if 0 <= grid_x < GRID_SIZE and 0 <= grid_y < GRID_SIZE:
-                            if state.player_hits[grid_y][grid_x] == 0:
-                                if state.ai_board[grid_y][grid_x] is not None:
-                                    state.player_hits[grid_y][grid_x] = 2
-                                    state.animations.append(Animation((grid_x, grid_y), "explosion", "ai"))
-                                    explosion_sound.play()
-                                else:
-                                    state.player_hits[grid_y][grid_x] = 1
-                                    state.animations.append(Animation((grid_x, grid_y), "splash", "ai"))
-                                    splash_sound.play()
-
-                                state.player_turn = False
-
-            # AI's turn
+            # AI's turn runs on the worker; keep drawing until its shots are ready
             if not state.player_turn:
-                ai_turn(state)
-                state.player_turn = True
+                ai_worker.start_turn(state)
+                targets = ai_worker.poll(state)
+                if targets is not None:
+                    for x, y in targets:
+                        apply_ai_shot(state, x, y)
+                    state.player_turn = True
+                    if state.turns is not None:
+                        state.turns.end_turn()
+
+            draw_playing_phase(canvas, state, state.hint_uses, hint_positions if hint_active else [])
 
             # Check victory
             if check_victory(state.player_hits, state.ai_board):
                 state.player_score += 1
-                state.game_phase = "gameover"
+                state.set_phase("gameover")
             elif check_victory(state.ai_hits, state.player_board):
                 state.ai_score += 1
-                state.game_phase = "gameover"
+                state.set_phase("gameover")
+            if state.game_phase == "gameover":
+                # A winning shot has already handed the AI its next turn; that turn never comes
+                ai_worker.cancel()
+                if history is not None:
+                    record_match(history, state, difficulty,
+                                 time.perf_counter() - match_started, ai_worker.think_ms)
+                if analytics is not None:
+                    analytics.end_game(state.player_score > 0)
+                    analytics.save()  # About a kilobyte, during the game-over pause anyway
 
         elif state.game_phase == "gameover":
-            pygame.mixer.music.stop()  # Stop the current music
-            pygame.time.delay(1500)
+            audio.stop_music()
+            scenes.delay(1500)
             if state.player_score == 1:
-                win_sound.play()
+                audio.play("win")
                 text = FONT_LARGE.render(f"YOU WIN!", True, TEXT_COLOR)
             else:
-                lost_sound.play()
+                audio.play("lost")
                 text = FONT_LARGE.render(f"YOU LOST!", True, TEXT_COLOR)
-            screen.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, SCREEN_HEIGHT // 2 - 50))
-            pygame.display.flip()
-            pygame.time.delay(3000)
+            canvas.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, SCREEN_HEIGHT // 2 - 50))
+            canvas.present()
+            scenes.delay(3000)
             state.reset()
-            pygame.mixer.music.play(-1)  # Restart the music from the beginning
-            hint_uses = MAX_HINTS  # Reset hint counter
+            audio.restart_music()  # Restart the music from the beginning
             hint_active = False
+            match_started = time.perf_counter()
+            ai_worker.think_ms = 0
 
         # Draw UI elements
-        if difficulty == "MEDIUM":
-            turn_text = FONT.render("Difficulty: Medium | Fog: Active | Enemy MultiShot: Inactive", True, TEXT_COLOR)
-        elif difficulty == "HARD":
-            turn_text = FONT.render("Difficulty: Hard | Fog: Active | Enemy MultiShot: Active", True, TEXT_COLOR)
-        else:
-            turn_text = FONT.render("Difficulty: Easy | Fog: Inactive | Enemy MultiShot: Inactive", True, TEXT_COLOR)
-        screen.blit(turn_text, (20, 20))
+        draw_difficulty_label(canvas, difficulty, ENABLE_FOG, max(AI_SHOT_OPTIONS))
+        if practice:
+            canvas.blit(render_text(FONT, "Practice: Z undo / Y redo"), (SCREEN_WIDTH - 300, 20))
 
-        pygame.display.flip()
-        clock.tick(30)
+        canvas.present()
+        latency.presented()
+        elapsed = clock.tick(30)
 # TESTING
 #if __name__ == "__main__":
-#    main_game("MEDIUM", pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT)))
\ No newline at end of file
+#    SceneManager(pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT)), pygame.time.Clock()).run(main_game, difficulty="MEDIUM")
\ No newline at end of file
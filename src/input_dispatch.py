@@ -0,0 +1,99 @@
+import os
+import time
+
+# Print an input-latency report when leaving the game (set BATTLESHIPS_LATENCY_REPORT=1)
+LATENCY_REPORT = bool(os.environ.get("BATTLESHIPS_LATENCY_REPORT"))
+
+# Histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS_MS = [4, 8, 16, 33, 50, 100, 200, 500, float("inf")]
+
+
+class CellLookup:
+    """ Precomputed pixel -> grid cell tables for the two boards.
+
+    Built once per layout, so a click costs two list lookups instead of
+    repeated grid arithmetic in every input branch.
+    """
+
+    def __init__(self, boards, top, grid_size, pitch, width, height):
+        # boards: {"player": offset_x, "ai": offset_x}
+        self.columns = {}
+        for name, offset_x in boards.items():
+            self.columns[name] = [self.to_cell(px - offset_x, pitch, grid_size) for px in range(width)]
+        self.rows = [self.to_cell(py - top, pitch, grid_size) for py in range(height)]
+
+    @staticmethod
+    def to_cell(offset, pitch, grid_size):
+        cell = offset // pitch
+        return cell if 0 <= cell < grid_size else -1
+
+    def cell_at(self, board, pos):
+        """ (x, y) of the cell under pos on the given board, or None. """
+        px, py = pos
+        if not (0 <= py < len(self.rows)):
+            return None
+        columns = self.columns[board]
+        if not (0 <= px < len(columns)):
+            return None
+        x, y = columns[px], self.rows[py]
+        if x < 0 or y < 0:
+            return None
+        return x, y
+
+
+class LatencyTracker:
+    """ Input-to-photon latency: time from an input's arrival to presenting the frame showing its effect.
+
+    pygame events carry no arrival time, and an input can wait in SDL's queue for most of
+    a frame before it is dequeued. Every event drained in one poll arrived after the
+    previous poll, so that time stands in for the arrival: the measured latency includes
+    the queue wait and is an upper bound rather than missing it.
+    """
+
+    def __init__(self):
+        self.pending = []
+        self.histograms = {}
+        self.totals = {}
+        self.worst = {}
+        self.last_poll = self.arrived_after = time.perf_counter()
+
+    def polled(self):
+        # Call right before draining the event queue
+        self.arrived_after, self.last_poll = self.last_poll, time.perf_counter()
+
+    def stamp(self):
+        """ Earliest time an event from the current poll could have arrived. """
+        return self.arrived_after
+
+    def mark(self, stamp, kind):
+        # The input changed something; it counts once the next frame is on screen
+        self.pending.append((stamp, kind))
+
+    def presented(self):
+        if not self.pending:
+            return
+        now = time.perf_counter()
+        for stamp, kind in self.pending:
+            latency_ms = (now - stamp) * 1000
+            histogram = self.histograms.setdefault(kind, [0] * len(LATENCY_BUCKETS_MS))
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if latency_ms <= bound:
+                    histogram[i] += 1
+                    break
+            self.totals[kind] = self.totals.get(kind, 0) + latency_ms
+            self.worst[kind] = max(self.worst.get(kind, 0), latency_ms)
+        self.pending.clear()
+
+    def report(self):
+        lines = []
+        for kind, histogram in sorted(self.histograms.items()):
+            count = sum(histogram)
+            lines.append(f"{kind}: {count} inputs, mean {self.totals[kind] / count:.1f} ms, "
+                         f"worst {self.worst[kind]:.1f} ms")
+            lower = 0
+            for bound, hits in zip(LATENCY_BUCKETS_MS, histogram):
+                if hits:
+                    label = f"> {lower} ms" if bound == float("inf") else f"{lower}-{bound} ms"
+                    lines.append(f"  {label:>12}: {hits}")
+                lower = bound
+        return "\n".join(lines)
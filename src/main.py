@@ -1,6 +1,11 @@
 import pygame
 import sys
 from src import menu
+from src.game import GRID_SIZE
+from src.match_history import MatchHistory
+from src.scenes import SceneManager
+from src.shot_analytics import load_shot_analytics
+from src.spectator import BROADCAST_ADDRESS, StreamPublisher, StreamServer, parse_address
 
 SCREEN_WIDTH = 1280
 SCREEN_HEIGHT = 720
@@ -11,10 +16,13 @@ def main():
     pygame.display.set_caption("Battleships")
     clock = pygame.time.Clock()
     menu.loading_animation(screen, clock)
-    menu.main_menu(pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE))
-
-    # Placeholder for game loop once implemented
-    print("Game starting...")
+    publisher = None
+    if BROADCAST_ADDRESS:
+        publisher = StreamPublisher()
+        StreamServer(publisher, *parse_address(BROADCAST_ADDRESS))
+    # One display, clock and asset set for the whole session; scenes hand over to each other
+    SceneManager(screen, clock, history=MatchHistory(), analytics=load_shot_analytics(GRID_SIZE),
+                 publisher=publisher).run(menu.main_menu)
 
     pygame.quit()
     sys.exit()
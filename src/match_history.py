@@ -0,0 +1,182 @@
+""" Local match history in SQLite.
+
+record() only puts the match on a queue; a writer thread commits queued matches in
+batches, so logging never touches the disk from the render thread. Totals per
+difficulty are kept in a summary table updated in the same transaction as the
+inserts, so aggregates cost one row lookup however many matches (simulated ones
+included) have been stored, and the leaderboard is read from a covering index alone.
+
+Queries use their own connection, and can run while the writer is busy (WAL mode).
+"""
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+HISTORY_PATH = "match_history.sqlite"
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 1.0  # Seconds a recorded match may wait before it is written
+
+Match = namedtuple("Match", "difficulty won shots hints_used duration ai_think_ms source played_at",
+                   defaults=("player", None))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    difficulty TEXT NOT NULL,
+    won INTEGER NOT NULL,
+    shots INTEGER NOT NULL,
+    hints_used INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    ai_think_ms REAL NOT NULL,
+    source TEXT NOT NULL
+);
+-- Leaderboard: fewest shots, then fastest, among wins at one difficulty. Holds every
+-- column the query returns, so it never reads the table. Replaces matches_leaderboard,
+-- which lacked played_at and hints_used.
+DROP INDEX IF EXISTS matches_leaderboard;
+CREATE INDEX IF NOT EXISTS matches_ranking
+    ON matches (source, difficulty, won, shots, duration, played_at, hints_used);
+CREATE INDEX IF NOT EXISTS matches_played_at ON matches (played_at);
+CREATE TABLE IF NOT EXISTS difficulty_totals (
+    difficulty TEXT NOT NULL,
+    source TEXT NOT NULL,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    shots INTEGER NOT NULL,
+    hints_used INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    ai_think_ms REAL NOT NULL,
+    PRIMARY KEY (difficulty, source)
+);
+"""
+
+INSERT_MATCH = """
+INSERT INTO matches (played_at, difficulty, won, shots, hints_used, duration, ai_think_ms, source)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+ADD_TOTALS = """
+INSERT INTO difficulty_totals (difficulty, source, games, wins, shots, hints_used, duration, ai_think_ms)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (difficulty, source) DO UPDATE SET
+    games = games + excluded.games,
+    wins = wins + excluded.wins,
+    shots = shots + excluded.shots,
+    hints_used = hints_used + excluded.hints_used,
+    duration = duration + excluded.duration,
+    ai_think_ms = ai_think_ms + excluded.ai_think_ms
+"""
+
+
+def connect(path):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL; only the last batch is at risk on power loss
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def write_batch(connection, matches):
+    """ Inserts the matches and folds them into the per-difficulty totals, in one transaction. """
+    totals = {}
+    rows = []
+    for match in matches:
+        rows.append((match.played_at, match.difficulty, int(match.won), match.shots,
+                     match.hints_used, match.duration, match.ai_think_ms, match.source))
+        total = totals.setdefault((match.difficulty, match.source), [0, 0, 0, 0, 0.0, 0.0])
+        total[0] += 1
+        total[1] += int(match.won)
+        total[2] += match.shots
+        total[3] += match.hints_used
+        total[4] += match.duration
+        total[5] += match.ai_think_ms
+    with connection:
+        connection.executemany(INSERT_MATCH, rows)
+        connection.executemany(ADD_TOTALS, [key + tuple(total) for key, total in totals.items()])
+
+
+class MatchHistory:
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, name="match-history", daemon=True)
+        self.closed = False
+        connect(path).close()  # Create the schema before anyone queries
+        self.thread.start()
+        atexit.register(self.close)  # The game exits with sys.exit(); still write what's queued
+
+    def record(self, match):
+        """ Queues a Match for writing. Never blocks. """
+        if match.played_at is None:
+            match = match._replace(played_at=time.time())
+        self.queue.put(match)
+
+    def run(self):
+        connection = connect(self.path)
+        stop = False
+        while not stop:
+            batch = []
+            deadline = None
+            while len(batch) < BATCH_SIZE:
+                try:
+                    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    match = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if match is None:
+                    stop = True
+                    break
+                batch.append(match)
+                if deadline is None:
+                    deadline = time.monotonic() + FLUSH_INTERVAL
+            if batch:
+                write_batch(connection, batch)
+        connection.close()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.queue.put(None)
+            self.thread.join()
+
+    # Queries
+
+    def query(self, sql, params):
+        connection = sqlite3.connect(self.path)
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    def leaderboard(self, difficulty, limit=10, source="player"):
+        """ Best wins at a difficulty: fewest shots, then shortest. """
+        return self.query(
+            "SELECT played_at, shots, duration, hints_used FROM matches "
+            "WHERE source = ? AND difficulty = ? AND won = 1 ORDER BY shots, duration LIMIT ?",
+            (source, difficulty, limit))
+
+    def difficulty_stats(self, source="player"):
+        """ {difficulty: {games, win_rate, avg_shots, avg_hints, avg_duration, avg_ai_think_ms}} """
+        rows = self.query(
+            "SELECT difficulty, games, wins, shots, hints_used, duration, ai_think_ms "
+            "FROM difficulty_totals WHERE source = ?", (source,))
+        return {
+            difficulty: {
+                "games": games,
+                "win_rate": wins / games,
+                "avg_shots": shots / games,
+                "avg_hints": hints / games,
+                "avg_duration": duration / games,
+                "avg_ai_think_ms": think / games,
+            }
+            for difficulty, games, wins, shots, hints, duration, think in rows
+        }
+
+    def recent(self, limit=20):
+        return self.query(
+            "SELECT played_at, difficulty, won, shots, hints_used, duration, ai_think_ms FROM matches "
+            "ORDER BY played_at DESC LIMIT ?", (limit,))
@@ -7,12 +7,20 @@ import time
 
 from src import game
 from src.config import TITLE_FONT, OPTION_FONT, WHITE, BLACK
+from src.timestep import FixedTimestep
 
 # Screen settings
 SCREEN_WIDTH = 1280
 SCREEN_HEIGHT = 720
 WATER_LEVEL = SCREEN_HEIGHT - 300
 
+# Waves, foam and the submarine move by a fixed amount per logic step, tuned for 60 steps a second
+MENU_STEP_MS = 1000 / 60
+
+# The menu's effects run a wall-clock-dependent number of steps, so they draw from their
+# own RNG; the module-level one stays reproducible for seeded sessions (see playback.py)
+effects_random = random.Random()
+
 # TEXT Colors
 BUTTON_COLOR = (50, 50, 50)
 BUTTON_BORDER_COLOR = (200, 200, 200)
@@ -68,7 +76,7 @@ class Submarine(pygame.sprite.Sprite):
         self.screen_width = screen_width
         self.water_level = water_level
         self.sprite_images = sprite_images
-        self.image = random.choice(self.sprite_images)  # Randomize initial sprite
+        self.image = effects_random.choice(self.sprite_images)  # Randomize initial sprite
         self.rect = self.image.get_rect()
         self.width = self.rect.width
         self.height = self.rect.height
@@ -76,19 +84,21 @@ class Submarine(pygame.sprite.Sprite):
 
     def reset_position(self):
         """Reset the submarine's position and direction."""
-        self.direction = random.choice([-1, 1])  # -1: right-to-left, 1: left-to-right
-        self.image = random.choice(self.sprite_images)  # Randomize sprite again
+        self.direction = effects_random.choice([-1, 1])  # -1: right-to-left, 1: left-to-right
+        self.image = effects_random.choice(self.sprite_images)  # Randomize sprite again
         if self.direction == 1:
             self.x = -self.width  # Start off-screen left
         else:
             self.x = self.screen_width  # Start off-screen right
             self.image = pygame.transform.flip(self.image, True, False)  # Flip for left-facing
         self.y = WATER_LEVEL - self.height // 2 +100# Adjust to submerge half of the submarine
-        self.speed = random.uniform(1.2, 2.5)  # Randomize speed
+        self.speed = effects_random.uniform(1.2, 2.5)  # Randomize speed
         self.visible = True
+        self.previous_x = self.x  # Don't interpolate across the jump to the other side
 
     def update(self):
         """Update the submarine's position and handle resetting when off-screen."""
+        self.previous_x = self.x
         if self.direction == 1:  # Moving left-to-right
             self.x += self.speed
             if self.x > self.screen_width:  # Off-screen right
@@ -98,15 +108,16 @@ class Submarine(pygame.sprite.Sprite):
             if self.x < -self.width:  # Off-screen left
                 self.reset_position()
 
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
         """Draw the submarine with a clipped area to simulate submersion."""
         if self.visible:
             # Define a clipping rectangle that matches the water level
             clip_rect = pygame.Rect(0, 0, self.screen_width, WATER_LEVEL + 100)
             screen.set_clip(clip_rect)  # Set clipping area
 
-            # Draw the submarine (only the part above water will be visible)
-            screen.blit(self.image, (self.x, self.y))
+            # Draw the submarine (only the part above water will be visible), between its last two positions
+            x = self.previous_x + (self.x - self.previous_x) * alpha
+            screen.blit(self.image, (x, self.y))
 
             # Reset clipping to draw other elements normally
             screen.set_clip(None)
@@ -117,7 +128,7 @@ class Wave:
         self.speed = speed
         self.amplitude = amplitude
         self.length = length
-        self.phase = random.uniform(0, 2 * math.pi)
+        self.phase = effects_random.uniform(0, 2 * math.pi)
 
 class Slider:
     def __init__(self, x, y, width, min_val, max_val, initial_val):
@@ -169,16 +180,18 @@ class WaterAnimation:
             wave.phase += wave.speed * 0.05
             wave.phase %= 2 * math.pi
 
-    def draw_waves(self):
+    def draw_waves(self, alpha=1.0):
         """Draw all wave layers with dynamic lighting"""
         for i, wave in enumerate(self.waves):
             color = pygame.Color(*COLORS["mid_water"])
             color.hsla = (210, 40, 30 + i * 5, 0)
 
+            # Interpolate back from the latest step; sin() doesn't mind the phase wrapping
+            phase = wave.phase - (1 - alpha) * wave.speed * 0.05
             points = []
             for x in range(-50, SCREEN_WIDTH + 50, 5):
                 y = WATER_LEVEL + wave.y_offset
-                y += math.sin(x / wave.length + wave.phase) * wave.amplitude
+                y += math.sin(x / wave.length + phase) * wave.amplitude
                 points.append((x, y))
 
             if len(points) > 2:
@@ -187,10 +200,10 @@ class WaterAnimation:
 
     def add_sparkles(self):
         """Add light sparkles to water surface"""
-        if random.random() < 0.05:
-            x = random.randint(0, SCREEN_WIDTH)
-            y = WATER_LEVEL - random.randint(0, 50)
-            self.sparkles.append([x, y, random.randint(5, 15)])
+        if effects_random.random() < 0.05:
+            x = effects_random.randint(0, SCREEN_WIDTH)
+            y = WATER_LEVEL - effects_random.randint(0, 50)
+            self.sparkles.append([x, y, effects_random.randint(5, 15)])
 
     def update_sparkles(self):
         """Animate and remove old sparkles"""
@@ -214,16 +227,16 @@ class WaterAnimation:
         """Add foam particles at wave peaks"""
         for wave in self.waves[:2]:  # Only top waves get foam
             for _ in range(2):
-                x = random.randint(0, SCREEN_WIDTH)
+                x = effects_random.randint(0, SCREEN_WIDTH)
                 wave_y = WATER_LEVEL + wave.y_offset + math.sin(x / wave.length + wave.phase) * wave.amplitude
-                self.foam_particles.append([x, wave_y, random.uniform(1.0, 2.0)])
+                self.foam_particles.append([x, wave_y, effects_random.uniform(1.0, 2.0)])
 
     def update_foam(self):
         """Animate and remove old foam particles"""
         new_foam = []
         for particle in self.foam_particles:
-            particle[0] += random.uniform(-0.5, 0.5)
-            particle[1] += random.uniform(-0.2, 0.5)
+            particle[0] += effects_random.uniform(-0.5, 0.5)
+            particle[1] += effects_random.uniform(-0.2, 0.5)
             particle[2] -= 0.02
             if particle[2] > 0:
                 new_foam.append(particle)
@@ -237,17 +250,18 @@ class WaterAnimation:
             pygame.draw.circle(surface, (*COLORS["foam"], alpha), (4, 4), int(size))
             self.screen.blit(surface, (x - 4, y - 4))
 
-    def draw_background(self):
-        self.screen.blit(self.gradient, (0, 0))
+    def update(self):
+        """Advance waves, sparkles and foam by one logic step"""
         self.update_waves()
-        self.draw_waves()
-
         self.add_sparkles()
         self.update_sparkles()
-        self.draw_sparkles()
-
         self.add_foam()
         self.update_foam()
+
+    def draw_background(self, alpha=1.0):
+        self.screen.blit(self.gradient, (0, 0))
+        self.draw_waves(alpha)
+        self.draw_sparkles()
         self.draw_foam()
 
 def draw_text(screen, text, font, color, x, y):
@@ -298,39 +312,55 @@ def load_submarine_sprites():
     return sprites
 
 
-def main_menu(screen_mode):
-    pygame.init()
-
-    # Load and play background music
-    pygame.mixer.music.load("../assets/Sounds/mars.mid")  # Change this to your actual file path
-    pygame.mixer.music.set_volume(0.5)  # Adjust volume (0.0 to 1.0)
-    pygame.mixer.music.play(-1)  # Play in an infinite loop
-
-    is_fullscreen = (screen_mode == pygame.FULLSCREEN)
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT),
-                                     pygame.FULLSCREEN if is_fullscreen else pygame.RESIZABLE)
-    pygame.display.set_caption("Battleships")
-    clock = pygame.time.Clock()
-
-    water_animation = WaterAnimation(screen)
-    submarine_sprites = load_submarine_sprites()
-    submarine = Submarine(SCREEN_WIDTH, WATER_LEVEL, submarine_sprites)
-
+def load_menu_assets(screen):
+    """ Everything the menu draws, loaded once per session through the scene manager. """
     instructions_icon = pygame.image.load("../assets/Menu/help_icon.png").convert_alpha()
     exit_icon = pygame.image.load("../assets/Menu/exit_icon.png").convert_alpha()
     instructions_icon = pygame.transform.scale(instructions_icon, (100, 100))
     exit_icon = pygame.transform.scale(exit_icon, (55, 55))
 
-    start_button = Button(SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2, 400, 70, text="Start Game", font=TITLE_FONT)
-    instructions_button = Button(SCREEN_WIDTH // 2 - 300, SCREEN_HEIGHT // 2 + 150, 100, 100, image=instructions_icon)
-    exit_button = Button(SCREEN_WIDTH // 2 + 200, SCREEN_HEIGHT // 2 + 150, 100, 100, image=exit_icon)
+    logo_image = pygame.image.load("../assets/Menu/battleship_logo.png").convert_alpha()
+    logo_image = pygame.transform.scale(logo_image, (300, 300))
 
-    easy_button = Button(SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 - 150, 400, 70, text="EASY", font=TITLE_FONT)
-    medium_button = Button(SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 - 50, 400, 70, text="MEDIUM", font=TITLE_FONT)
-    hard_button = Button(SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 + 50, 400, 70, text="HARD", font=TITLE_FONT)
-    back_button = Button(SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 + 150, 400, 70, text="BACK", font=TITLE_FONT)
+    return {
+        "water_animation": WaterAnimation(screen),
+        "submarine": Submarine(SCREEN_WIDTH, WATER_LEVEL, load_submarine_sprites()),
+        "start_button": Button(SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2, 400, 70, text="Start Game", font=TITLE_FONT),
+        "instructions_button": Button(SCREEN_WIDTH // 2 - 300, SCREEN_HEIGHT // 2 + 150, 100, 100, image=instructions_icon),
+        "exit_button": Button(SCREEN_WIDTH // 2 + 200, SCREEN_HEIGHT // 2 + 150, 100, 100, image=exit_icon),
+        "easy_button": Button(SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 - 150, 400, 70, text="EASY", font=TITLE_FONT),
+        "medium_button": Button(SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 - 50, 400, 70, text="MEDIUM", font=TITLE_FONT),
+        "hard_button": Button(SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 + 50, 400, 70, text="HARD", font=TITLE_FONT),
+        "back_button": Button(SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 + 150, 400, 70, text="BACK", font=TITLE_FONT),
+        "practice_button": Button(SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT // 2 + 240, 400, 70, text="PRACTICE: OFF", font=TITLE_FONT),
+        "instructions_font": pygame.font.Font(None, 36),
+        "logo_image": logo_image,
+        "logo_rect": logo_image.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4)),
+    }
+
+
+def main_menu(scenes):
+    """ Menu scene. Returns the game scene once a difficulty is picked. """
+    scenes.play_music("../assets/Sounds/mars.mid")
+    pygame.display.set_caption("Battleships")
+    screen = scenes.screen
+    clock = scenes.clock
+
+    assets = scenes.asset("menu", lambda: load_menu_assets(screen))
+    water_animation = assets["water_animation"]
+    water_animation.screen = screen  # The display surface may have changed while in the game
+    submarine = assets["submarine"]
+    start_button = assets["start_button"]
+    instructions_button = assets["instructions_button"]
+    exit_button = assets["exit_button"]
+    easy_button = assets["easy_button"]
+    medium_button = assets["medium_button"]
+    hard_button = assets["hard_button"]
+    back_button = assets["back_button"]
+    practice_button = assets["practice_button"]
+    instructions_font = assets["instructions_font"]
+    logo_image, logo_rect = assets["logo_image"], assets["logo_rect"]
 
-    instructions_font = pygame.font.Font(None, 36)
     instructions_text = [
         "",
         "Game Controls:",
@@ -339,22 +369,28 @@ def main_menu(screen_mode):
         "- Hint Button: Reveal ship locations (limited).",
         "- Quit Button: Exit the game.",
         "- F Key: Toggle Fullscreen mode.",
+        "- Z / Y Keys (practice only): Undo / redo a turn.",
     ]
 
-    logo_image = pygame.image.load("../assets/Menu/battleship_logo.png").convert_alpha()
-    logo_image = pygame.transform.scale(logo_image, (300, 300))
-    logo_rect = logo_image.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4))
-
     global show_difficulty_buttons, show_instructions
     show_difficulty_buttons = False
     show_instructions = False
     selected_difficulty = None
+    # Practice matches allow undo and stay out of the match history and shot statistics
+    practice = False
+    practice_button.text = "PRACTICE: OFF"
+
+    timestep = FixedTimestep(MENU_STEP_MS)
+    elapsed = 0
 
     while True:
+        for _ in range(timestep.advance(elapsed)):
+            water_animation.update()
+            submarine.update()
+
         screen.fill(BLACK)
-        water_animation.draw_background()
-        submarine.update()
-        submarine.draw(screen)
+        water_animation.draw_background(timestep.alpha)
+        submarine.draw(screen, timestep.alpha)
 
         if show_instructions:
             # Draw a semi-transparent background for the instructions
@@ -392,10 +428,11 @@ def main_menu(screen_mode):
             medium_button.draw(screen)
             hard_button.draw(screen)
             back_button.draw(screen)
+            practice_button.draw(screen)
 
         pygame.display.flip()
 
-        for event in pygame.event.get():
+        for event in scenes.get_events():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -413,27 +450,24 @@ def main_menu(screen_mode):
                     sys.exit()
             else:
                 if easy_button.is_clicked(event):
-                    selected_difficulty = "EASY"
-                    game.main_game(difficulty=selected_difficulty, screen_mode=screen_mode)
-                    return
+                    return game.main_game, {"difficulty": "EASY", "practice": practice}
                 elif medium_button.is_clicked(event):
-                    selected_difficulty = "MEDIUM"
-                    game.main_game(difficulty=selected_difficulty, screen_mode=screen_mode)
-                    return
+                    return game.main_game, {"difficulty": "MEDIUM", "practice": practice}
                 elif hard_button.is_clicked(event):
-                    selected_difficulty = "HARD"
-                    game.main_game(difficulty=selected_difficulty, screen_mode=screen_mode)
-                    return
+                    return game.main_game, {"difficulty": "HARD", "practice": practice}
+                elif practice_button.is_clicked(event):
+                    practice = not practice
+                    practice_button.text = f"PRACTICE: {'ON' if practice else 'OFF'}"
                 elif back_button.is_clicked(event):
                     show_difficulty_buttons = False
                     selected_difficulty = None
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_f:
-                    screen_mode = pygame.FULLSCREEN if screen_mode == pygame.RESIZABLE else pygame.RESIZABLE
-                    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), screen_mode)
+                    screen = scenes.set_fullscreen(not scenes.fullscreen)
+                    water_animation.screen = screen
                 if event.key == pygame.K_ESCAPE:
                     pygame.quit()
                     sys.exit()
 
-        clock.tick(60)
+        elapsed = clock.tick(60)
@@ -0,0 +1,121 @@
+import os
+import random
+from array import array
+
+# Where the precomputed books live (relative to src/, like the other assets)
+OPENING_BOOK_DIR = "../assets/Data"
+BOOK_LENGTH = 20
+BOOK_SYMMETRIES = 8  # Flips and transpose of the board, as in placement_heatmap.transform_layout
+
+# Books already loaded this session, keyed by (grid_size, ship sizes): one per symmetry
+_books = {}
+
+
+def book_key(grid_size, ship_sizes):
+    return grid_size, tuple(sorted(ship_sizes, reverse=True))
+
+
+def book_path(grid_size, ship_sizes):
+    _, sizes = book_key(grid_size, ship_sizes)
+    name = f"opening_book_{grid_size}_{''.join(str(size) for size in sizes)}.bin"
+    return os.path.join(OPENING_BOOK_DIR, name)
+
+
+def placement_density(grid_size, ship_sizes, misses):
+    """ Counts, for every cell, how many legal ship placements cover it given the misses. """
+    density = [[0] * grid_size for _ in range(grid_size)]
+    for size in ship_sizes:
+        for y in range(grid_size):
+            for x in range(grid_size):
+                # Horizontal placement starting at (x, y)
+                if x + size <= grid_size and all((x + i, y) not in misses for i in range(size)):
+                    for i in range(size):
+                        density[y][x + i] += 1
+                # Vertical placement starting at (x, y)
+                if y + size <= grid_size and all((x, y + i) not in misses for i in range(size)):
+                    for i in range(size):
+                        density[y + i][x] += 1
+    return density
+
+
+def generate_opening_book(grid_size, ship_sizes, length=BOOK_LENGTH):
+    """ Ranks opening shots greedily: each shot is the densest cell assuming every earlier one missed. """
+    misses = set()
+    book = []
+    for _ in range(min(length, grid_size * grid_size)):
+        density = placement_density(grid_size, ship_sizes, misses)
+        best = max(
+            ((x, y) for y in range(grid_size) for x in range(grid_size) if (x, y) not in misses),
+            key=lambda cell: density[cell[1]][cell[0]]
+        )
+        book.append(best)
+        misses.add(best)
+    return book
+
+
+def transform_book(book, grid_size, symmetry):
+    """ The book under one of the BOOK_SYMMETRIES board symmetries; 0 leaves it as generated. """
+    flip_x, flip_y, transpose = symmetry & 1, symmetry & 2, symmetry & 4
+    transformed = []
+    for x, y in book:
+        if transpose:
+            x, y = y, x
+        if flip_x:
+            x = grid_size - 1 - x
+        if flip_y:
+            y = grid_size - 1 - y
+        transformed.append((x, y))
+    return transformed
+
+
+def random_symmetry(rng=random):
+    return rng.randrange(BOOK_SYMMETRIES)
+
+
+def save_opening_book(book, grid_size, ship_sizes):
+    # Two bytes per shot: the cell index y * grid_size + x
+    os.makedirs(OPENING_BOOK_DIR, exist_ok=True)
+    with open(book_path(grid_size, ship_sizes), "wb") as f:
+        array("H", (y * grid_size + x for x, y in book)).tofile(f)
+
+
+def load_opening_book(grid_size, ship_sizes, symmetry=0):
+    """ Returns the opening book for this fleet, loading it from disk on first use.
+
+    If no cached book exists yet, or the file is damaged, it is generated on the spot (and
+    kept in memory only).
+    Placement density is the same under every board symmetry, so each of the
+    BOOK_SYMMETRIES variants is as good an opening as the generated book. Playing a
+    random one per match keeps the AI from opening with the same shots every game.
+    """
+    key = book_key(grid_size, ship_sizes)
+    if key not in _books:
+        try:
+            indices = array("H")
+            with open(book_path(grid_size, ship_sizes), "rb") as f:
+                indices.frombytes(f.read())
+            if any(index >= grid_size * grid_size for index in indices):
+                raise ValueError("book cell outside the grid")
+            book = [(index % grid_size, index // grid_size) for index in indices]
+        except (OSError, ValueError):
+            # ValueError: damaged, e.g. an odd number of bytes from a write that was cut short
+            book = generate_opening_book(grid_size, ship_sizes)
+        _books[key] = [transform_book(book, grid_size, variant) for variant in range(BOOK_SYMMETRIES)]
+    return _books[key][symmetry]
+
+
+def next_book_shot(book, hits):
+    """ First book cell that has not been fired at yet, or None once the book is used up. """
+    for x, y in book:
+        if hits[y][x] == 0:
+            return x, y
+    return None
+
+
+# Offline generator: run from src/ with the repo root on PYTHONPATH
+if __name__ == "__main__":
+    from src.game import GRID_SIZE, SHIPS
+
+    sizes = [size for size, _, _ in SHIPS.values()]
+    save_opening_book(generate_opening_book(GRID_SIZE, sizes), GRID_SIZE, sizes)
+    print(f"Saved opening book to {book_path(GRID_SIZE, sizes)}")
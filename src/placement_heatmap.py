@@ -0,0 +1,219 @@
+""" Simulation-derived layout pool for AI ship placement.
+
+Offline, a density-based hunter plays many games against random fleets and records how
+early each cell tends to get shot. Random layouts are then scored by how long the hunter
+needs to first touch each ship, and the safest ones are cached per grid size and fleet.
+At game start place_ai_ships() just picks one (under a random board symmetry).
+
+Build the cache from src/ with the repo root on PYTHONPATH:
+
+    PYTHONPATH=.. python placement_heatmap.py --games 300
+"""
+import argparse
+import os
+import random
+import struct
+from array import array
+
+POOL_DIR = "../assets/Data"
+POOL_SIZE = 256
+CANDIDATE_LAYOUTS = 20000
+
+# Pools already loaded this session, keyed by (grid_size, ship sizes)
+_pools = {}
+
+
+def pool_path(grid_size, ship_sizes):
+    name = f"placement_pool_{grid_size}_{''.join(str(size) for size in ship_sizes)}.bin"
+    return os.path.join(POOL_DIR, name)
+
+
+def ship_cells(row, col, orientation, size):
+    if orientation == 'H':
+        return [(col + i, row) for i in range(size)]
+    return [(col, row + i) for i in range(size)]
+
+
+def random_layout(grid_size, ship_sizes, rng=random):
+    """ One (row, col, orientation) per ship, placed by rejection sampling like place_ai_ships. """
+    occupied = set()
+    layout = []
+    for size in ship_sizes:
+        while True:
+            orientation = rng.choice(['H', 'V'])
+            row = rng.randint(0, grid_size - (size if orientation == 'V' else 1))
+            col = rng.randint(0, grid_size - (size if orientation == 'H' else 1))
+            cells = ship_cells(row, col, orientation, size)
+            if not occupied.intersection(cells):
+                occupied.update(cells)
+                layout.append((row, col, orientation))
+                break
+    return layout
+
+
+def hunt_density(grid_size, ship_sizes, left, hits, misses, open_hits):
+    """ Placement density of every unshot cell for the ships that aren't sunk yet. """
+    density = {}
+    for index, size in enumerate(ship_sizes):
+        if not left[index]:
+            continue  # Sunk ships can't be anywhere else
+        for y in range(grid_size):
+            for x in range(grid_size):
+                for orientation in ('H', 'V'):
+                    cells = ship_cells(y, x, orientation, size)
+                    if any(cx >= grid_size or cy >= grid_size or (cx, cy) in misses for cx, cy in cells):
+                        continue
+                    # Placements through unresolved hits are far more likely
+                    weight = 1 + 20 * len(open_hits.intersection(cells))
+                    for cell in cells:
+                        if cell not in hits:
+                            density[cell] = density.get(cell, 0) + weight
+    return density
+
+
+class Hunter:
+    """ A density-based player working against one known layout. """
+
+    def __init__(self, layout, grid_size, ship_sizes):
+        self.grid_size = grid_size
+        self.ship_sizes = ship_sizes
+        self.ships = {}
+        for index, ((row, col, orientation), size) in enumerate(zip(layout, ship_sizes)):
+            for cell in ship_cells(row, col, orientation, size):
+                self.ships[cell] = index
+        self.remaining = len(self.ships)
+        self.hits, self.misses = set(), set()
+        self.open_hits = set()  # Hits on ships that aren't sunk yet
+        self.left = {index: size for index, size in enumerate(ship_sizes)}
+
+    def best_target(self):
+        density = hunt_density(self.grid_size, self.ship_sizes, self.left, self.hits, self.misses, self.open_hits)
+        return max(density, key=density.get)
+
+    def fire(self, target):
+        if target in self.ships:
+            self.hits.add(target)
+            self.open_hits.add(target)
+            self.remaining -= 1
+            index = self.ships[target]
+            self.left[index] -= 1
+            if not self.left[index]:
+                self.open_hits.difference_update(cell for cell, owner in self.ships.items() if owner == index)
+        else:
+            self.misses.add(target)
+
+
+def hunt(layout, grid_size, ship_sizes):
+    """ Plays a density hunter against a layout and returns the cells in the order it shot them. """
+    hunter = Hunter(layout, grid_size, ship_sizes)
+    order = []
+    while hunter.remaining:
+        target = hunter.best_target()
+        hunter.fire(target)
+        order.append(target)
+    return order
+
+
+def build_heatmap(grid_size, ship_sizes, games, rng=random):
+    """ Average number of shots fired before each cell was shot (cells never shot count as the full game). """
+    totals = [0.0] * (grid_size * grid_size)
+    for _ in range(games):
+        order = hunt(random_layout(grid_size, ship_sizes, rng), grid_size, ship_sizes)
+        turn = {cell: i for i, cell in enumerate(order)}
+        for y in range(grid_size):
+            for x in range(grid_size):
+                totals[y * grid_size + x] += turn.get((x, y), len(order))
+    return [total / games for total in totals]
+
+
+def layout_safety(layout, heatmap, grid_size, ship_sizes):
+    # Sum over ships of how long until the hunter is expected to first touch it
+    return sum(
+        min(heatmap[y * grid_size + x] for x, y in ship_cells(row, col, orientation, size))
+        for (row, col, orientation), size in zip(layout, ship_sizes)
+    )
+
+
+def build_layout_pool(heatmap, grid_size, ship_sizes, pool_size=POOL_SIZE, candidates=CANDIDATE_LAYOUTS, rng=random):
+    layouts = [random_layout(grid_size, ship_sizes, rng) for _ in range(candidates)]
+    layouts.sort(key=lambda layout: layout_safety(layout, heatmap, grid_size, ship_sizes), reverse=True)
+    return layouts[:pool_size]
+
+
+def save_layout_pool(pool, heatmap, grid_size, ship_sizes):
+    # Heatmap in tenths of a shot, then 3 bytes per ship: cell index + orientation
+    os.makedirs(POOL_DIR, exist_ok=True)
+    with open(pool_path(grid_size, ship_sizes), "wb") as f:
+        f.write(struct.pack("<HH", len(heatmap), len(pool)))
+        array("H", (round(value * 10) for value in heatmap)).tofile(f)
+        for layout in pool:
+            for row, col, orientation in layout:
+                f.write(struct.pack("<Hc", row * grid_size + col, orientation.encode()))
+
+
+def load_layout_pool(grid_size, ship_sizes):
+    """ Cached low-risk layouts for this fleet, or an empty list if none have been built. """
+    key = (grid_size, tuple(ship_sizes))
+    if key not in _pools:
+        try:
+            with open(pool_path(grid_size, ship_sizes), "rb") as f:
+                data = f.read()
+        except OSError:
+            data = None
+
+        pool = []
+        if data:
+            cells, count = struct.unpack_from("<HH", data)
+            offset = 4 + 2 * cells
+            for _ in range(count):
+                layout = []
+                for _ in ship_sizes:
+                    cell, orientation = struct.unpack_from("<Hc", data, offset)
+                    layout.append((cell // grid_size, cell % grid_size, orientation.decode()))
+                    offset += 3
+                pool.append(layout)
+        _pools[key] = pool
+    return _pools[key]
+
+
+def transform_layout(layout, grid_size, ship_sizes, rng=random):
+    """ The same layout under a random board symmetry (flips and transpose), so 8 variants per entry. """
+    flip_x, flip_y, transpose = rng.random() < 0.5, rng.random() < 0.5, rng.random() < 0.5
+    transformed = []
+    for (row, col, orientation), size in zip(layout, ship_sizes):
+        if transpose:
+            row, col, orientation = col, row, ('V' if orientation == 'H' else 'H')
+        length_x = size if orientation == 'H' else 1
+        length_y = size if orientation == 'V' else 1
+        if flip_x:
+            col = grid_size - col - length_x
+        if flip_y:
+            row = grid_size - row - length_y
+        transformed.append((row, col, orientation))
+    return transformed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the AI placement layout pool")
+    parser.add_argument("--games", type=int, default=300, help="hunter games used for the heatmap")
+    parser.add_argument("--candidates", type=int, default=CANDIDATE_LAYOUTS)
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Grid and fleet come from the game's own configuration (no window or sound needed)
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("BATTLESHIPS_AUDIO", "null")
+    from src.game import GRID_SIZE, SHIPS
+
+    rng = random.Random(args.seed)
+    sizes = [size for size, _, _ in SHIPS.values()]
+    heatmap = build_heatmap(GRID_SIZE, sizes, args.games, rng)
+    pool = build_layout_pool(heatmap, GRID_SIZE, sizes, args.pool_size, args.candidates, rng)
+    save_layout_pool(pool, heatmap, GRID_SIZE, sizes)
+    print(f"Saved {len(pool)} layouts to {pool_path(GRID_SIZE, sizes)}")
+
+
+if __name__ == "__main__":
+    main()
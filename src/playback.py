@@ -0,0 +1,312 @@
+""" Scripted input recording and playback for end-to-end profiling.
+
+Record a session by playing it normally; the input events, the frame each one arrived
+on and the RNG seed are saved as JSON:
+
+    PYTHONPATH=.. python playback.py record session.json --seed 42
+
+Play it back unattended through main_menu -> main_game, with frames run back to back
+and the game-over pauses skipped, optionally under cProfile or a sampling profiler:
+
+    PYTHONPATH=.. python playback.py play session.json --profile cprofile --stats session.prof
+    PYTHONPATH=.. python playback.py play session.json --headless --profile sample
+
+Events are replayed by frame number, not by time, so the same clicks land on the same
+screens however fast playback runs. The frames on which the AI finished each turn are
+recorded too, and playback applies the AI's shots on the same frames (waiting for the
+worker if needed). The AI itself still runs for real, so its work shows up in profiles.
+For it to make the same choices, both sides seed the RNG alike and run the AI without
+wall-clock limits: no endgame deadline, and no random fallback shot when a turn runs
+long.
+"""
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+# --headless must take effect before pygame (and the game module, on import) start SDL
+if "--headless" in sys.argv:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("BATTLESHIPS_AUDIO", "null")
+
+import pygame
+
+from src import game, menu
+from src.ai_worker import AIWorker
+from src.scenes import SceneManager
+
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+
+# Event types worth recording, and the attributes kept for each
+EVENT_TYPES = {
+    "QUIT": pygame.QUIT,
+    "KEYDOWN": pygame.KEYDOWN,
+    "KEYUP": pygame.KEYUP,
+    "MOUSEBUTTONDOWN": pygame.MOUSEBUTTONDOWN,
+    "MOUSEBUTTONUP": pygame.MOUSEBUTTONUP,
+    "MOUSEMOTION": pygame.MOUSEMOTION,
+}
+EVENT_NAMES = {value: name for name, value in EVENT_TYPES.items()}
+EVENT_FIELDS = ("pos", "rel", "buttons", "button", "key", "mod", "unicode", "scancode")
+
+
+def encode_event(event):
+    data = {"type": EVENT_NAMES[event.type]}
+    for field in EVENT_FIELDS:
+        if hasattr(event, field):
+            value = getattr(event, field)
+            data[field] = list(value) if isinstance(value, tuple) else value
+    return data
+
+
+def decode_event(data):
+    fields = {field: tuple(value) if isinstance(value, list) else value
+              for field, value in data.items() if field != "type"}
+    return pygame.event.Event(EVENT_TYPES[data["type"]], fields)
+
+
+def make_deterministic(seed):
+    random.seed(seed)
+    # A deadline would make the endgame AI's shots depend on machine speed and profiler overhead
+    game.ENDGAME_SOLVER.time_budget = None
+
+
+class RecordingAIWorker(AIWorker):
+    def __init__(self, scenes):
+        super().__init__(time_budget_ms=float("inf"))  # Playback can't reproduce a fallback shot
+        self.scenes = scenes
+
+    def poll(self, state):
+        targets = super().poll(state)
+        if targets is not None:
+            self.scenes.ai_frames.append(self.scenes.frame)
+        return targets
+
+
+class RecordingScenes(SceneManager):
+    """ Plays like the normal game while logging every input event by frame. """
+
+    def __init__(self, screen, clock, seed):
+        super().__init__(screen, clock)
+        self.seed = seed
+        self.events = []
+        self.ai_frames = []
+
+    def get_events(self):
+        events = super().get_events()
+        for event in events:
+            if event.type in EVENT_NAMES:
+                self.events.append([self.frame, encode_event(event)])
+        return events
+
+    def create_ai_worker(self):
+        return RecordingAIWorker(self)
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"seed": self.seed, "frames": self.frame, "events": self.events,
+                       "ai_frames": self.ai_frames}, f)
+
+
+class FastClock:
+    """ Stands in for pygame.time.Clock during playback: frames run back to back.
+
+    Every frame reports exactly its nominal duration, so the fixed-timestep logic runs
+    the same number of steps on every playback, however long the frames really took.
+    """
+
+    def tick(self, framerate=0):
+        return 1000 / framerate if framerate else 0
+
+
+class PlaybackAIWorker(AIWorker):
+    def __init__(self, scenes):
+        super().__init__(time_budget_ms=float("inf"))
+        self.scenes = scenes
+
+    def poll(self, state):
+        ai_frames = self.scenes.ai_frames
+        if self.future is None or not ai_frames:
+            return super().poll(state)
+        if self.scenes.frame < ai_frames[0]:
+            return None
+        # The recorded turn ended on this frame: wait for the worker if it's still thinking
+        ai_frames.pop(0)
+        targets = self.future.result()
+        self.future = None
+        self.think_ms += pygame.time.get_ticks() - self.started_at
+        return targets
+
+
+class PlaybackScenes(SceneManager):
+    """ Feeds a recorded session back into the scenes instead of the real input queue. """
+
+    def __init__(self, screen, session):
+        super().__init__(screen, FastClock())
+        self.events = {}
+        for frame, data in session["events"]:
+            self.events.setdefault(frame, []).append(decode_event(data))
+        self.last_frame = session["frames"]
+        self.ai_frames = list(session["ai_frames"])
+        self.pos = (0, 0)
+
+    def get_events(self):
+        self.frame += 1
+        pygame.event.pump()  # Keep the window responsive; the real queue is otherwise ignored
+        pygame.event.clear()
+        if self.frame > self.last_frame:
+            # The recording ran out without a quit
+            return [pygame.event.Event(pygame.QUIT)]
+        events = self.events.get(self.frame, [])
+        for event in events:
+            if hasattr(event, "pos"):
+                self.pos = event.pos
+        return events
+
+    def mouse_pos(self):
+        return self.pos
+
+    def delay(self, ms):
+        pass
+
+    def create_ai_worker(self):
+        return PlaybackAIWorker(self)
+
+
+class SamplingProfiler:
+    """ Samples the stacks of the game's threads at a fixed interval; much lighter than cProfile.
+
+    Each thread (main loop, AI worker) gets its own report. Samples of an idle worker,
+    parked in the executor waiting for work, are skipped. Calls that release the GIL
+    (present() flipping the display) still collect more than their share of samples.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.own = {}  # Thread name -> samples with the function on top of the stack
+        self.total = {}  # Thread name -> samples with the function anywhere on the stack
+        self.samples = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="sampler", daemon=True)
+
+    def start(self):
+        # Without a short GIL switch interval, samples pile up wherever the main thread releases the GIL
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, self.interval / 10))
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        sys.setswitchinterval(self.switch_interval)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.thread.ident or frame.f_code.co_name == "_worker":
+                    continue
+                name = names.get(thread_id, str(thread_id))
+                self.samples[name] += 1
+                self.own.setdefault(name, Counter())[self.label(frame)] += 1
+                seen = set()
+                while frame is not None:
+                    seen.add(self.label(frame))
+                    frame = frame.f_back
+                self.total.setdefault(name, Counter()).update(seen)
+
+    @staticmethod
+    def label(frame):
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+    def report(self, limit=20):
+        lines = []
+        for name, samples in self.samples.most_common():
+            lines.append(f"{name}: {samples} samples every {self.interval * 1000:.0f} ms")
+            lines.append(f"{'own':>7} {'total':>7}  function")
+            for label, count in self.total[name].most_common(limit):
+                lines.append(f"{self.own[name][label] / samples:7.1%} {count / samples:7.1%}  {label}")
+        return "\n".join(lines)
+
+
+def record(args):
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    make_deterministic(seed)
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+    scenes = RecordingScenes(screen, pygame.time.Clock(), seed)
+    try:
+        scenes.run(menu.main_menu)
+    except SystemExit:
+        pass  # Quitting from the menu or the game ends the recording
+    finally:
+        scenes.save(args.session)
+    print(f"Recorded {len(scenes.events)} events over {scenes.frame} frames (seed {seed}) to {args.session}")
+
+
+def play(args):
+    with open(args.session) as f:
+        session = json.load(f)
+    make_deterministic(session["seed"])
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+    scenes = PlaybackScenes(screen, session)
+
+    profiler = None
+    if args.profile == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif args.profile == "sample":
+        profiler = SamplingProfiler(args.interval / 1000)
+        profiler.start()
+
+    start = time.perf_counter()
+    try:
+        scenes.run(menu.main_menu)
+    except SystemExit:
+        pass
+    elapsed = time.perf_counter() - start
+
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        if args.stats:
+            profiler.dump_stats(args.stats)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+    elif profiler is not None:
+        profiler.stop()
+        print(profiler.report())
+    print(f"Played {scenes.frame} frames in {elapsed:.2f}s ({scenes.frame / elapsed:.1f} FPS)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay input sessions for profiling")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="play normally and save the input")
+    record_parser.add_argument("session", help="JSON file to write")
+    record_parser.add_argument("--seed", type=int, help="RNG seed (random if omitted)")
+    record_parser.set_defaults(func=record)
+
+    play_parser = commands.add_parser("play", help="replay a recorded session")
+    play_parser.add_argument("session", help="JSON file written by record")
+    play_parser.add_argument("--profile", choices=["none", "cprofile", "sample"], default="none")
+    play_parser.add_argument("--stats", help="where to dump cProfile stats (for snakeviz etc.)")
+    play_parser.add_argument("--interval", type=float, default=5, help="sampling interval in ms")
+    play_parser.add_argument("--headless", action="store_true", help="use SDL's dummy video and audio drivers")
+    play_parser.set_defaults(func=play)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
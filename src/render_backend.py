@@ -0,0 +1,130 @@
+import os
+import weakref
+
+import pygame
+
+# Which backend the game screen uses: "surface" (default), "texture" or "texture-software".
+# "texture-software" uses SDL's software renderer, so it also works on machines without a GPU.
+RENDER_BACKEND = os.environ.get("BATTLESHIPS_RENDERER", "surface")
+
+# Wrapper around the display module's window. It is kept for the whole session: freeing it
+# after the display has been set up again takes the display window down with it.
+_display_window = None
+
+
+class SurfaceBackend:
+    """ The classic path: everything is blitted onto the display Surface. """
+    name = "surface"
+
+    def __init__(self, screen):
+        self.screen = screen
+
+    def fill(self, color):
+        self.screen.fill(color)
+
+    def blit(self, image, pos, area=None):
+        self.screen.blit(image, pos, area)
+
+    def draw_rect(self, color, rect, width=0):
+        pygame.draw.rect(self.screen, color, rect, width)
+
+    def present(self):
+        pygame.display.flip()
+
+    def set_fullscreen(self, fullscreen):
+        size = self.screen.get_size()
+        self.screen = pygame.display.set_mode(size, pygame.FULLSCREEN if fullscreen else pygame.RESIZABLE)
+
+    def to_surface(self):
+        return self.screen
+
+    def close(self):
+        pass
+
+
+class TextureBackend:
+    """ Draws with pygame._sdl2.video: every Surface is uploaded once as a Texture and reused.
+
+    A Renderer can't share a window with the display Surface, so the display window is
+    hidden while the game window is open and shown again on close().
+    """
+    name = "texture"
+
+    def __init__(self, size, title, fullscreen=False, software=False):
+        from pygame._sdl2 import video
+
+        global _display_window
+        if _display_window is None:
+            _display_window = video.Window.from_display_module()
+
+        self.video = video
+        self.display_window = _display_window
+        self.window = video.Window(title, size=size, fullscreen=fullscreen)
+        try:
+            self.renderer = video.Renderer(self.window, accelerated=0 if software else -1)
+        except Exception:
+            self.window.destroy()
+            raise
+        self.display_window.hide()
+        # Textures die together with the Surface they were uploaded from
+        self.textures = weakref.WeakKeyDictionary()
+
+    def texture(self, image):
+        texture = self.textures.get(image)
+        if texture is None:
+            texture = self.video.Texture.from_surface(self.renderer, image)
+            self.textures[image] = texture
+        return texture
+
+    def fill(self, color):
+        self.renderer.draw_color = pygame.Color(color)
+        self.renderer.clear()
+
+    def blit(self, image, pos, area=None):
+        texture = self.texture(image)
+        x, y = pos[:2]
+        if area is None:
+            texture.draw(dstrect=(x, y, texture.width, texture.height))
+        else:
+            area = pygame.Rect(area)
+            texture.draw(srcrect=area, dstrect=(x, y, area.width, area.height))
+
+    def draw_rect(self, color, rect, width=0):
+        self.renderer.draw_color = pygame.Color(color)
+        rect = pygame.Rect(rect)
+        if width == 0:
+            self.renderer.fill_rect(rect)
+            return
+        # The renderer only draws 1px outlines, so stack them for thicker borders
+        for i in range(width):
+            self.renderer.draw_rect(rect.inflate(-2 * i, -2 * i))
+
+    def present(self):
+        self.renderer.present()
+
+    def set_fullscreen(self, fullscreen):
+        if fullscreen:
+            self.window.set_fullscreen()
+        else:
+            self.window.set_windowed()
+
+    def to_surface(self):
+        return self.renderer.to_surface()
+
+    def close(self):
+        self.textures.clear()
+        self.renderer = None
+        self.window.destroy()
+        self.display_window.show()
+
+
+def create_backend(screen, title, fullscreen=False, backend=None):
+    """ Builds the configured backend, falling back to plain Surface blits if SDL2 textures are unavailable. """
+    backend = backend or RENDER_BACKEND
+    if backend in ("texture", "texture-software"):
+        try:
+            return TextureBackend(screen.get_size(), title, fullscreen,
+                                  software=(backend == "texture-software"))
+        except Exception as e:
+            print(f"Texture renderer unavailable ({e}), using Surface rendering")
+    return SurfaceBackend(screen)
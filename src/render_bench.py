@@ -0,0 +1,122 @@
+""" Headless render benchmark.
+
+Renders the playing screen and the menu's water animation offscreen with SDL's dummy
+drivers, saves a few frames as images and reports frames per second. Run it from src/
+with the repo root on PYTHONPATH, like the game itself:
+
+    PYTHONPATH=.. python render_bench.py --frames 300 --save-every 100
+"""
+import argparse
+import os
+import random
+import time
+
+# Must be set before pygame opens a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("BATTLESHIPS_AUDIO", "null")
+
+import pygame
+
+from src import game, menu
+from src.render_backend import create_backend
+
+
+def scripted_state(difficulty="HARD", seed=0, shots=30):
+    """ A mid-game GameState: both fleets placed and some shots fired on each board. """
+    random.seed(seed)
+    game.set_difficulty(difficulty)
+    state = game.GameState()
+    state.place_ai_ships()
+
+    for ship in state.ships:
+        while True:
+            row, col = random.randrange(game.GRID_SIZE), random.randrange(game.GRID_SIZE)
+            ship.orientation = random.choice(['H', 'V'])
+            if state.validate_ship_placement(row, col, ship.size, ship.orientation):
+                break
+        ship.row, ship.col = row, col
+        for i in range(ship.size):
+            if ship.orientation == 'H':
+                state.player_board[row][col + i] = ship
+            else:
+                state.player_board[row + i][col] = ship
+    state.current_ship = len(state.ships)
+    state.game_phase = "playing"
+
+    cells = [(x, y) for y in range(game.GRID_SIZE) for x in range(game.GRID_SIZE)]
+    for x, y in random.sample(cells, shots):
+        state.player_hits[y][x] = 2 if state.ai_board[y][x] else 1
+    for x, y in random.sample(cells, shots):
+        state.ai_hits[y][x] = 2 if state.player_board[y][x] else 1
+    state.update_probability_map()
+    return state
+
+
+def run_frames(name, frames, draw, canvas, out_dir, save_every):
+    start = time.perf_counter()
+    for i in range(frames):
+        draw(i)
+        canvas.present()
+        if save_every and i % save_every == 0:
+            pygame.image.save(canvas.to_surface(), os.path.join(out_dir, f"{name}_{i:05}.png"))
+    elapsed = time.perf_counter() - start
+    print(f"{name}: {frames} frames in {elapsed:.2f}s ({frames / elapsed:.1f} FPS)")
+    return frames / elapsed
+
+
+def bench_game(screen, args):
+    state = scripted_state(args.difficulty, args.seed)
+    canvas = create_backend(screen, "Battleship Wars", backend=args.backend)
+    hint_positions = [(0, 0), (1, 1), (2, 2)]
+
+    def draw(i):
+        # Keep an explosion running so animation blits are part of the measurement
+        if not state.animations:
+            state.animations.append(game.Animation((i % game.GRID_SIZE, 0), "explosion", "ai"))
+        game.update_animations(state, game.GAME_STEP_MS)
+        canvas.fill(game.OCEAN)
+        game.draw_playing_phase(canvas, state, game.MAX_HINTS, hint_positions)
+        game.draw_difficulty_label(canvas, args.difficulty, game.ENABLE_FOG, max(game.AI_SHOT_OPTIONS))
+
+    fps = run_frames("game", args.frames, draw, canvas, args.out, args.save_every)
+    canvas.close()
+    return fps
+
+
+def bench_menu(screen, args):
+    menu.effects_random.seed(args.seed)
+    water_animation = menu.WaterAnimation(screen)
+    submarine = menu.Submarine(menu.SCREEN_WIDTH, menu.WATER_LEVEL, menu.load_submarine_sprites())
+    canvas = create_backend(screen, "Battleships", backend="surface")
+
+    def draw(i):
+        water_animation.update()
+        submarine.update()
+        screen.fill(menu.BLACK)
+        water_animation.draw_background()
+        submarine.draw(screen)
+
+    return run_frames("menu", args.frames, draw, canvas, args.out, args.save_every)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offscreen render throughput benchmark")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--save-every", type=int, default=100, help="save every Nth frame (0 = none)")
+    parser.add_argument("--out", default="render_frames")
+    parser.add_argument("--backend", default="surface", help="surface, texture or texture-software")
+    parser.add_argument("--difficulty", default="HARD")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    pygame.init()
+    screen = pygame.display.set_mode((game.SCREEN_WIDTH, game.SCREEN_HEIGHT))
+    bench_game(screen, args)
+    bench_menu(screen, args)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
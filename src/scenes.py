@@ -0,0 +1,65 @@
+import pygame
+
+from src.ai_worker import AIWorker
+from src.audio import get_audio
+
+
+class SceneManager:
+    """ Runs menu and game scenes in a flat loop instead of having them call each other.
+
+    A scene is a function taking the manager (plus keyword arguments) and returning the
+    next (scene, kwargs) pair, or None to stop. The manager owns the one display, the
+    clock and any assets scenes load through asset(), so switching scenes reloads
+    nothing and the call stack stays flat. Music goes through the audio dispatcher,
+    which keeps every track in memory after its first use.
+
+    Scenes read input, wait and start the AI through the manager (get_events, mouse_pos,
+    delay, create_ai_worker), so playback.py can drive a whole session from a recording.
+    """
+
+    def __init__(self, screen, clock, fullscreen=False, history=None, analytics=None, publisher=None):
+        self.screen = screen
+        self.clock = clock
+        self.fullscreen = fullscreen
+        self.history = history  # Optional match_history.MatchHistory finished matches are logged to
+        self.analytics = analytics  # Optional shot_analytics.ShotAnalytics player shots are fed to
+        self.publisher = publisher  # Optional spectator.StreamPublisher matches are broadcast on
+        self.assets = {}
+        self.frame = 0  # Number of get_events() calls, i.e. frames run so far
+
+    def asset(self, key, loader):
+        """ Loads an asset the first time it is asked for and keeps it for the whole session. """
+        if key not in self.assets:
+            self.assets[key] = loader()
+        return self.assets[key]
+
+    def set_fullscreen(self, fullscreen):
+        if fullscreen != self.fullscreen:
+            self.reset_display(fullscreen)
+        return self.screen
+
+    def reset_display(self, fullscreen):
+        self.fullscreen = fullscreen
+        self.screen = pygame.display.set_mode(self.screen.get_size(),
+                                              pygame.FULLSCREEN if fullscreen else pygame.RESIZABLE)
+
+    def play_music(self, path, volume=0.5):
+        get_audio().play_music(path, volume)
+
+    def get_events(self):
+        self.frame += 1
+        return pygame.event.get()
+
+    def mouse_pos(self):
+        return pygame.mouse.get_pos()
+
+    def delay(self, ms):
+        pygame.time.delay(ms)
+
+    def create_ai_worker(self):
+        return AIWorker()
+
+    def run(self, scene, **kwargs):
+        while scene is not None:
+            next_scene = scene(self, **kwargs)
+            scene, kwargs = next_scene if next_scene else (None, {})
@@ -0,0 +1,180 @@
+""" Streaming statistics of where human players shoot and how they use hints.
+
+Nothing is kept per shot or per game beyond the match in progress. Each statistic is a
+fixed-size array of exponentially decayed counters, so old sessions fade out and the
+memory stays the same however long the game has been played. Decay is lazy: instead of
+scaling every counter on each event, new amounts are added at a weight that grows by
+1 / decay per event, and reads divide by that weight. Counting a shot is O(1), and the
+rare renormalisation is O(grid cells).
+
+The current match's shots and hints are held back until end_game(), so a match that is
+quit before the end never reaches the statistics.
+
+Two heatmaps follow player shots: every shot, and only the first EARLY_SHOTS shots of a
+game (where a fleet gets found). Per-game counters cover shots, wins and hints. The
+state is checkpointed after every match as a file of about a kilobyte. place_ai_ships()
+reads early_heatmap() at game start to keep the AI's ships away from where players
+like to open.
+"""
+import os
+import struct
+from array import array
+
+ANALYTICS_PATH = "shot_analytics.bin"
+SHOT_HALF_LIFE = 2000  # Player shots until a shot counts half as much
+GAME_HALF_LIFE = 50  # Matches until a match counts half as much
+EARLY_SHOTS = 20
+MIN_GAMES = 3  # Decayed matches needed before the heatmaps are trusted
+
+# Per-game counters, in checkpoint order
+GAME_STATS = ["games", "wins", "shots", "hints", "hint_shots", "hint_hits"]
+
+CHECKPOINT_MAGIC = b"SHTA"
+CHECKPOINT_VERSION = 1
+RESCALE_LIMIT = 1e100
+
+
+class DecayedCounters:
+    """ size counters that all decay by the same factor on every tick(). """
+
+    def __init__(self, size, half_life):
+        self.decay = 0.5 ** (1 / half_life)
+        self.values = array("d", [0.0]) * size  # Stored multiplied by self.weight
+        self.weight = 1.0
+
+    def add(self, index, amount=1.0):
+        self.values[index] += amount * self.weight
+
+    def tick(self):
+        self.weight /= self.decay
+        if self.weight > RESCALE_LIMIT:
+            self.values = array("d", (value / self.weight for value in self.values))
+            self.weight = 1.0
+
+    def get(self, index):
+        return self.values[index] / self.weight
+
+    def totals(self):
+        return [value / self.weight for value in self.values]
+
+    def load(self, values):
+        self.values = array("d", values)
+        self.weight = 1.0
+
+
+class ShotAnalytics:
+    def __init__(self, grid_size, path=ANALYTICS_PATH):
+        self.grid_size = grid_size
+        self.path = path
+        self.shots = DecayedCounters(grid_size * grid_size, SHOT_HALF_LIFE)
+        self.early = DecayedCounters(grid_size * grid_size, SHOT_HALF_LIFE)
+        self.games = DecayedCounters(len(GAME_STATS), GAME_HALF_LIFE)
+        self.start_game()
+
+    def start_game(self):
+        """ Starts a match, dropping whatever an abandoned one recorded. """
+        self.game_shots = []  # (cell, hit, hinted) of the current match
+        self.game_hints = 0
+
+    def record_shot(self, x, y, hit, hinted=False):
+        self.game_shots.append((y * self.grid_size + x, bool(hit), hinted))
+
+    def record_hint(self):
+        self.game_hints += 1
+
+    def end_game(self, won):
+        """ Counts the finished match and its shots. """
+        for i, (cell, hit, hinted) in enumerate(self.game_shots):
+            self.shots.add(cell)
+            if i < EARLY_SHOTS:
+                self.early.add(cell)
+            self.shots.tick()
+            self.early.tick()
+            self.games.add(GAME_STATS.index("shots"))
+            if hinted:
+                self.games.add(GAME_STATS.index("hint_shots"))
+                self.games.add(GAME_STATS.index("hint_hits"), hit)
+        self.games.add(GAME_STATS.index("hints"), self.game_hints)
+        self.games.add(GAME_STATS.index("games"))
+        self.games.add(GAME_STATS.index("wins"), bool(won))
+        self.games.tick()
+        self.start_game()
+
+    # Queries
+
+    def early_heatmap(self):
+        """ Share of early player shots per cell (y * grid_size + x), or None without enough matches. """
+        if self.games.get(GAME_STATS.index("games")) < MIN_GAMES:
+            return None
+        return normalized(self.early.totals())
+
+    def shot_heatmap(self):
+        return normalized(self.shots.totals())
+
+    def hint_stats(self):
+        """ {games, win_rate, shots_per_game, hints_per_game, hint_follow_rate, hint_hit_rate}, decayed. """
+        games, wins, shots, hints, hint_shots, hint_hits = self.games.totals()
+        return {
+            "games": games,
+            "win_rate": wins / games if games else 0.0,
+            "shots_per_game": shots / games if games else 0.0,
+            "hints_per_game": hints / games if games else 0.0,
+            "hint_follow_rate": hint_shots / hints if hints else 0.0,
+            "hint_hit_rate": hint_hits / hint_shots if hint_shots else 0.0,
+        }
+
+    # Checkpoint: header, then both heatmaps and the game counters as float32
+
+    def save(self):
+        data = struct.pack("<4sBHB", CHECKPOINT_MAGIC, CHECKPOINT_VERSION, self.grid_size, len(GAME_STATS))
+        for counters in (self.shots, self.early, self.games):
+            data += array("f", counters.totals()).tobytes()
+        # Written to the side first, so a crash never leaves half a checkpoint
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, self.path)
+
+    def load(self):
+        """ Restores the last checkpoint. Missing or incompatible files leave the counters empty. """
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            magic, version, grid_size, stats = struct.unpack_from("<4sBHB", data)
+        except (OSError, struct.error):
+            return False
+        cells = self.grid_size * self.grid_size
+        if (magic, version, grid_size, stats) != (CHECKPOINT_MAGIC, CHECKPOINT_VERSION, self.grid_size, len(GAME_STATS)):
+            return False
+        values = array("f")
+        try:
+            values.frombytes(data[struct.calcsize("<4sBHB"):])
+        except ValueError:
+            return False  # Not a whole number of floats: cut short while being written
+        if len(values) != 2 * cells + stats:
+            return False
+        self.shots.load(values[:cells])
+        self.early.load(values[cells:2 * cells])
+        self.games.load(values[2 * cells:])
+        return True
+
+
+def normalized(values):
+    total = sum(values)
+    return [value / total for value in values] if total else values
+
+
+def layout_exposure(layout, heatmap, grid_size, ship_sizes):
+    """ Share of early player shots landing on this layout's ships; lower is safer. """
+    exposure = 0.0
+    for (row, col, orientation), size in zip(layout, ship_sizes):
+        for i in range(size):
+            x, y = (col + i, row) if orientation == 'H' else (col, row + i)
+            exposure += heatmap[y * grid_size + x]
+    return exposure
+
+
+def load_shot_analytics(grid_size, path=ANALYTICS_PATH):
+    analytics = ShotAnalytics(grid_size, path)
+    analytics.load()
+    return analytics
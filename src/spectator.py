@@ -0,0 +1,417 @@
+""" Live match streaming for spectators.
+
+GameState.emit() hands every state change to a StreamPublisher, which encodes it once
+as a few bytes and fans the same bytes object out to every Subscriber. Every
+KEYFRAME_INTERVAL events (and on subscribe or reset) a full keyframe is sent, so late
+spectators can sync up, and a spectator whose queue overflows gets its backlog replaced
+by a keyframe of the current state. SpectatorState applies the stream to rebuild just
+enough state for the normal board drawing code.
+
+StreamServer carries the stream over TCP to spectators in other processes or on other
+machines. Start the game with BATTLESHIPS_BROADCAST=[host:]port, then watch from src/
+with the repo root on PYTHONPATH:
+
+    BATTLESHIPS_BROADCAST=50607 PYTHONPATH=.. python main.py
+    PYTHONPATH=.. python spectator.py --port 50607
+"""
+import argparse
+import os
+import socket
+import struct
+import sys
+import threading
+from collections import deque
+
+import pygame
+
+from src import game
+from src.render_backend import create_backend
+from src.timestep import FixedTimestep
+
+KEYFRAME_INTERVAL = 50
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# "[host:]port" main.py serves matches on, if set; the default host only accepts local spectators
+BROADCAST_ADDRESS = os.environ.get("BATTLESHIPS_BROADCAST")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 50607
+SEND_INTERVAL = 1 / 30  # Seconds a sender waits for new messages before checking again
+FRAME_HEADER = struct.Struct("<H")  # Message length; every message is well under 64 KB
+
+# Message types (first byte of every message)
+MSG_KEYFRAME, MSG_SHOT, MSG_FOG, MSG_HINT, MSG_PHASE, MSG_PLACE = range(6)
+
+PHASES = ["setup", "playing", "gameover"]
+DIFFICULTIES = ["EASY", "MEDIUM", "HARD"]
+BOARDS = ["player", "ai"]  # Board that was fired at
+NO_CELL = 0xFFFF
+
+
+def pack_hits(hits, grid_size):
+    """ Packs a hit grid (0/1/2 per cell) at 2 bits per cell. """
+    packed = bytearray((grid_size * grid_size + 3) // 4)
+    for y in range(grid_size):
+        for x in range(grid_size):
+            index = y * grid_size + x
+            packed[index // 4] |= hits[y][x] << (2 * (index % 4))
+    return bytes(packed)
+
+
+def unpack_hits(data, grid_size):
+    hits = [[0] * grid_size for _ in range(grid_size)]
+    for index in range(grid_size * grid_size):
+        hits[index // grid_size][index % grid_size] = (data[index // 4] >> (2 * (index % 4))) & 3
+    return hits
+
+
+def pack_cells(cells, grid_size):
+    return struct.pack(f"<H{len(cells)}H", len(cells), *(y * grid_size + x for x, y in cells))
+
+
+def unpack_cells(data, offset, grid_size):
+    """ Returns the decoded cells and the offset just past them. """
+    count, = struct.unpack_from("<H", data, offset)
+    indices = struct.unpack_from(f"<{count}H", data, offset + 2)
+    return [(index % grid_size, index // grid_size) for index in indices], offset + 2 + 2 * count
+
+
+def encode_event(kind, args, grid_size):
+    if kind == "shot":
+        board, x, y, result = args
+        return struct.pack("<BBHB", MSG_SHOT, BOARDS.index(board), y * grid_size + x, result)
+    if kind == "fog":
+        added, removed = args
+        return bytes([MSG_FOG]) + pack_cells(added, grid_size) + pack_cells(removed, grid_size)
+    if kind == "hint":
+        return bytes([MSG_HINT]) + pack_cells(args[0], grid_size)
+    if kind == "phase":
+        return struct.pack("<BB", MSG_PHASE, PHASES.index(args[0]))
+    if kind == "place":
+        index, row, col, orientation = args
+        return struct.pack("<BBHc", MSG_PLACE, index, row * grid_size + col, orientation.encode())
+    raise ValueError(f"Unknown event kind: {kind}")
+
+
+def encode_keyframe(state, difficulty, grid_size):
+    header = struct.pack("<BBBBBBB", MSG_KEYFRAME, grid_size, DIFFICULTIES.index(difficulty),
+                         PHASES.index(state.game_phase), state.fog_active, state.hint_uses,
+                         max(game.AI_SHOT_OPTIONS))
+    ships = bytearray([len(state.ships)])
+    for i, ship in enumerate(state.ships):
+        placed = i < state.current_ship and ship.row >= 0
+        cell = ship.row * grid_size + ship.col if placed else NO_CELL
+        ships += struct.pack("<Hc", cell, ship.orientation.encode())
+    return (header + pack_hits(state.player_hits, grid_size) + pack_hits(state.ai_hits, grid_size)
+            + pack_cells(state.fog_positions, grid_size) + bytes(ships))
+
+
+class Subscriber:
+    def __init__(self, max_queue=SUBSCRIBER_QUEUE_SIZE):
+        self.queue = deque()
+        self.max_queue = max_queue
+        self.dropped = 0
+        self.ready = threading.Event()  # Set whenever there is something to poll
+
+    def deliver(self, message):
+        """ Queues a message; False if the subscriber is too far behind and needs resync() instead. """
+        if len(self.queue) >= self.max_queue:
+            return False
+        self.queue.append(message)
+        self.ready.set()
+        return True
+
+    def resync(self, keyframe):
+        # Drop the backlog; the keyframe describes the state after everything in it
+        self.dropped += len(self.queue)
+        self.queue.clear()
+        self.queue.append(keyframe)
+        self.ready.set()
+
+    def poll(self):
+        # popleft() is atomic, so a sender thread can drain the queue while the game fills it
+        self.ready.clear()
+        messages = []
+        while self.queue:
+            messages.append(self.queue.popleft())
+        return messages
+
+
+class StreamPublisher:
+    """ Encodes each event once and fans the bytes out to every subscriber. """
+
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.subscribers = []
+        self.waiting = deque()  # Subscribers from other threads, admitted by the game thread
+        self.state = None
+        self.difficulty = None
+        self.events_since_keyframe = 0
+
+    def attach(self, state, difficulty):
+        self.state = state
+        self.difficulty = difficulty
+        state.stream = self
+        self.broadcast_keyframe()
+        self.admit_waiting()
+
+    def subscribe(self, max_queue=SUBSCRIBER_QUEUE_SIZE):
+        """ A new subscriber, synced to the current state. Call from the thread that runs the game. """
+        subscriber = Subscriber(max_queue)
+        if self.state is not None:
+            # The stored keyframe may be behind by the deltas sent since, so encode the state as it is now
+            subscriber.resync(encode_keyframe(self.state, self.difficulty, game.GRID_SIZE))
+        self.subscribers = self.subscribers + [subscriber]
+        return subscriber
+
+    def subscribe_later(self, max_queue=SUBSCRIBER_QUEUE_SIZE):
+        """ subscribe() for other threads: the subscriber starts receiving at the next admit_waiting(). """
+        subscriber = Subscriber(max_queue)
+        self.waiting.append(subscriber)
+        return subscriber
+
+    def admit_waiting(self):
+        # Encoding a keyframe reads the game state, so only the game thread may do it
+        if self.state is None:
+            return
+        while self.waiting:
+            subscriber = self.waiting.popleft()
+            subscriber.resync(encode_keyframe(self.state, self.difficulty, game.GRID_SIZE))
+            self.subscribers = self.subscribers + [subscriber]
+
+    def unsubscribe(self, subscriber):
+        # Rebinding rather than removing in place keeps a broadcast on another thread safe
+        self.subscribers = [other for other in self.subscribers if other is not subscriber]
+
+    def broadcast_keyframe(self):
+        self.events_since_keyframe = 0
+        self.broadcast(encode_keyframe(self.state, self.difficulty, game.GRID_SIZE))
+
+    def broadcast(self, message):
+        fresh = None
+        for subscriber in self.subscribers:
+            if not subscriber.deliver(message):
+                # Events are published after the state changes, so the current state includes this one
+                if fresh is None:
+                    fresh = encode_keyframe(self.state, self.difficulty, game.GRID_SIZE)
+                subscriber.resync(fresh)
+
+    def publish(self, kind, *args):
+        if kind == "reset":
+            self.broadcast_keyframe()
+            return
+        self.broadcast(encode_event(kind, args, game.GRID_SIZE))
+        self.events_since_keyframe += 1
+        if self.events_since_keyframe >= self.keyframe_interval:
+            self.broadcast_keyframe()
+
+
+def parse_address(address):
+    """ (host, port) from "[host:]port". """
+    host, _, port = address.rpartition(":")
+    return host or DEFAULT_HOST, int(port)
+
+
+class StreamServer:
+    """ Serves a publisher's stream over TCP, one subscriber per connected spectator.
+
+    Each message goes out with a 2-byte length prefix. Sockets are only touched on the
+    server's own threads; the game thread still just appends to subscriber queues.
+    """
+
+    def __init__(self, publisher, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.publisher = publisher
+        self.listener = socket.create_server((host, port))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self.accept, name="stream-accept", daemon=True).start()
+
+    def accept(self):
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                return  # Listener closed
+            subscriber = self.publisher.subscribe_later()
+            threading.Thread(target=self.send, args=(connection, subscriber),
+                             name="stream-send", daemon=True).start()
+
+    def send(self, connection, subscriber):
+        try:
+            while True:
+                subscriber.ready.wait(SEND_INTERVAL)
+                messages = subscriber.poll()
+                if messages:
+                    connection.sendall(b"".join(FRAME_HEADER.pack(len(message)) + message for message in messages))
+        except OSError:
+            pass  # The spectator went away
+        finally:
+            self.publisher.unsubscribe(subscriber)
+            connection.close()
+
+    def close(self):
+        self.listener.close()
+
+
+class SocketSubscriber:
+    """ Reads a StreamServer's stream; poll() works like Subscriber.poll(), without blocking. """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.socket = socket.create_connection((host, port))
+        self.socket.setblocking(False)
+        self.buffer = bytearray()
+        self.closed = False
+
+    def poll(self):
+        while not self.closed:
+            try:
+                data = self.socket.recv(65536)
+            except BlockingIOError:
+                break
+            if not data:
+                self.closed = True  # The game exited
+                self.socket.close()
+            self.buffer += data
+
+        messages = []
+        offset = 0
+        while len(self.buffer) - offset >= FRAME_HEADER.size:
+            length, = FRAME_HEADER.unpack_from(self.buffer, offset)
+            if len(self.buffer) - offset - FRAME_HEADER.size < length:
+                break
+            start = offset + FRAME_HEADER.size
+            messages.append(bytes(self.buffer[start:start + length]))
+            offset = start + length
+        del self.buffer[:offset]
+        return messages
+
+
+class SpectatorState:
+    """ Just the parts of GameState the board drawing code reads, rebuilt from the stream. """
+
+    def __init__(self):
+        self.grid_size = game.GRID_SIZE
+        self.difficulty = "EASY"
+        self.player_board = [[None] * self.grid_size for _ in range(self.grid_size)]
+        self.player_hits = [[0] * self.grid_size for _ in range(self.grid_size)]
+        self.ai_hits = [[0] * self.grid_size for _ in range(self.grid_size)]
+        self.ships = [game.Ship(name, size, active, deactive)
+                      for name, (size, active, deactive) in game.SHIPS.items()]
+        self.fog_positions = set()
+        self.fog_active = False
+        self.max_ai_shots = 1
+        self.hint_uses = 0
+        self.hint_positions = []
+        self.game_phase = "setup"
+        self.animations = []
+        self.synced = False  # Deltas are ignored until the first keyframe arrives
+
+    def place_ship(self, index, cell, orientation):
+        ship = self.ships[index]
+        ship.row, ship.col = divmod(cell, self.grid_size)
+        ship.orientation = orientation
+        for i in range(ship.size):
+            if orientation == 'H':
+                self.player_board[ship.row][ship.col + i] = ship
+            else:
+                self.player_board[ship.row + i][ship.col] = ship
+
+    def apply(self, message):
+        kind = message[0]
+        if kind == MSG_KEYFRAME:
+            self.apply_keyframe(message)
+            return
+        if not self.synced:
+            return
+
+        if kind == MSG_SHOT:
+            _, board, cell, result = struct.unpack("<BBHB", message)
+            x, y = cell % self.grid_size, cell // self.grid_size
+            hits = self.ai_hits if BOARDS[board] == "player" else self.player_hits
+            hits[y][x] = result
+            self.hint_positions = []
+            self.animations.append(game.Animation((x, y), "explosion" if result == 2 else "splash", BOARDS[board]))
+        elif kind == MSG_FOG:
+            added, offset = unpack_cells(message, 1, self.grid_size)
+            removed, _ = unpack_cells(message, offset, self.grid_size)
+            self.fog_positions.difference_update(removed)
+            self.fog_positions.update(added)
+        elif kind == MSG_HINT:
+            self.hint_positions, _ = unpack_cells(message, 1, self.grid_size)
+            self.hint_uses = max(0, self.hint_uses - 1)
+        elif kind == MSG_PHASE:
+            self.game_phase = PHASES[message[1]]
+        elif kind == MSG_PLACE:
+            _, index, cell, orientation = struct.unpack("<BBHc", message)
+            self.place_ship(index, cell, orientation.decode())
+
+    def apply_keyframe(self, message):
+        _, grid_size, difficulty, phase, fog_active, hint_uses, max_ai_shots = struct.unpack_from("<BBBBBBB", message)
+        self.grid_size = grid_size
+        self.difficulty = DIFFICULTIES[difficulty]
+        self.game_phase = PHASES[phase]
+        self.fog_active = bool(fog_active)
+        self.hint_uses = hint_uses
+        self.max_ai_shots = max_ai_shots
+        self.hint_positions = []
+
+        offset = 7
+        hits_size = (grid_size * grid_size + 3) // 4
+        self.player_hits = unpack_hits(message[offset:offset + hits_size], grid_size)
+        offset += hits_size
+        self.ai_hits = unpack_hits(message[offset:offset + hits_size], grid_size)
+        offset += hits_size
+        fog, offset = unpack_cells(message, offset, grid_size)
+        self.fog_positions = set(fog)
+
+        self.player_board = [[None] * grid_size for _ in range(grid_size)]
+        for index in range(message[offset]):
+            cell, orientation = struct.unpack_from("<Hc", message, offset + 1 + 3 * index)
+            if cell != NO_CELL:
+                self.place_ship(index, cell, orientation.decode())
+        self.synced = True
+
+
+def spectate(subscriber, screen_mode=pygame.RESIZABLE):
+    """ Spectator mode of main_game: draws the match by applying deltas from the stream. """
+    pygame.init()
+    screen = pygame.display.set_mode((game.SCREEN_WIDTH, game.SCREEN_HEIGHT), screen_mode)
+    pygame.display.set_caption("Battleship Wars - Spectating")
+    clock = pygame.time.Clock()
+    canvas = create_backend(screen, "Battleship Wars - Spectating")
+    state = SpectatorState()
+    timestep = FixedTimestep(game.GAME_STEP_MS)
+    elapsed = 0
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                canvas.close()
+                pygame.quit()
+                sys.exit()
+
+        for message in subscriber.poll():
+            state.apply(message)
+        for _ in range(timestep.advance(elapsed)):
+            game.update_animations(state, game.GAME_STEP_MS)
+
+        canvas.fill(game.OCEAN)
+        if state.synced:
+            game.draw_playing_phase(canvas, state, state.hint_uses, state.hint_positions)
+            game.draw_difficulty_label(canvas, state.difficulty, state.fog_active, state.max_ai_shots)
+        canvas.present()
+        elapsed = clock.tick(30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a match streamed by a game started with BATTLESHIPS_BROADCAST")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    try:
+        subscriber = SocketSubscriber(args.host, args.port)
+    except OSError as error:
+        parser.exit(1, f"Can't reach a game at {args.host}:{args.port}: {error}\n")
+    spectate(subscriber)
+
+
+if __name__ == "__main__":
+    main()
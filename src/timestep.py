@@ -0,0 +1,24 @@
+class FixedTimestep:
+    """ Runs game logic in fixed steps, however fast or slow frames are drawn.
+
+    advance() takes the real time since the last frame and returns how many logic steps
+    to run for it; alpha is the fraction of a step left over, which rendering uses to
+    interpolate between the last two steps. After a long stall at most max_steps are
+    run and the rest is dropped, so a slow machine skips frames instead of falling ever
+    further behind.
+    """
+
+    def __init__(self, step_ms, max_steps=10):
+        self.step_ms = step_ms
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, elapsed_ms):
+        self.accumulator += elapsed_ms
+        steps = int(self.accumulator // self.step_ms)
+        self.accumulator -= steps * self.step_ms
+        return min(steps, self.max_steps)
+
+    @property
+    def alpha(self):
+        return self.accumulator / self.step_ms
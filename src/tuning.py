@@ -0,0 +1,227 @@
+""" Difficulty tuning by simulation.
+
+Grid-searches the difficulty knobs (AI shots per turn, hints, fog, AI targeting weights)
+by playing batches of simulated games on a process pool, then picks for every difficulty
+the setting whose player win rate is closest to its target. Finished evaluations are
+checkpointed after every candidate, so a long run can be stopped and resumed. The chosen
+presets are written to game.PRESETS_PATH, which set_difficulty loads.
+
+The simulated player is the density hunter from placement_heatmap. It spends hints while
+it has nothing to chase, and fog makes it fire blind some of the time. The AI is the
+game's own choose_ai_targets, with the endgame search limited by size rather than time,
+so a candidate's games only depend on its seed.
+
+    PYTHONPATH=.. python tuning.py --games 60 --workers 4
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from types import SimpleNamespace
+
+# The game module loads its sounds on import; simulations need neither window nor sound
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("BATTLESHIPS_AUDIO", "null")
+
+from src import game, opening_book, placement_heatmap
+
+CHECKPOINT_PATH = "tuning_checkpoint.json"
+
+# Player win rate each difficulty should end up with
+TARGET_WIN_RATES = {"EASY": 0.7, "MEDIUM": 0.5, "HARD": 0.3}
+
+SEARCH_SPACE = {
+    "ai_shot_options": [[1], [1, 2], [1, 2, 3]],
+    "max_hints": [1, 3, 5],
+    "fog_size": [None, [10, 30], [15, 50], [20, 50]],
+    "hit_weight": [10],
+    "line_bonus": [0, 5, 20],
+}
+
+# Share of fogged shots the simulated player fires without reading the board
+FOG_CONFUSION = 0.5
+
+
+def candidates(space=None):
+    space = space or SEARCH_SPACE
+    names = sorted(space)
+    for values in itertools.product(*(space[name] for name in names)):
+        params = dict(zip(names, values))
+        params["enable_fog"] = params["fog_size"] is not None
+        yield params
+
+
+def candidate_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def ai_layout(sizes, rng):
+    pool = placement_heatmap.load_layout_pool(game.GRID_SIZE, sizes)
+    if pool:
+        return placement_heatmap.transform_layout(rng.choice(pool), game.GRID_SIZE, sizes, rng)
+    return placement_heatmap.random_layout(game.GRID_SIZE, sizes, rng)
+
+
+def ai_turns_to_win(layout, sizes):
+    """ Turns the game's AI needs to sink a fleet laid out as given. """
+    board = [[None] * game.GRID_SIZE for _ in range(game.GRID_SIZE)]
+    for (row, col, orientation), size in zip(layout, sizes):
+        for x, y in placement_heatmap.ship_cells(row, col, orientation, size):
+            board[y][x] = True
+    state = SimpleNamespace(
+        player_board=board,
+        ai_hits=[[0] * game.GRID_SIZE for _ in range(game.GRID_SIZE)],
+        probability_map=[[0] * game.GRID_SIZE for _ in range(game.GRID_SIZE)],
+        book_symmetry=opening_book.random_symmetry(),
+    )
+    left = sum(sizes)
+    turns = 0
+    while left:
+        turns += 1
+        for x, y in game.choose_ai_targets(state):
+            state.ai_hits[y][x] = 2 if board[y][x] else 1
+            left -= board[y][x] is not None
+            state.probability_map = game.compute_probability_map(state.ai_hits)
+    return turns
+
+
+def player_turns_to_win(layout, sizes, params, rng):
+    """ Turns the simulated player needs against the AI fleet, with hints and fog. """
+    hunter = placement_heatmap.Hunter(layout, game.GRID_SIZE, sizes)
+    hints = params["max_hints"]
+    blind_chance = 0
+    if params["enable_fog"]:
+        # Roughly two fog clusters of average size on the board each turn
+        coverage = min(1.0, 2 * sum(params["fog_size"]) / 2 / game.GRID_SIZE ** 2)
+        blind_chance = FOG_CONFUSION * coverage
+
+    turns = 0
+    while hunter.remaining:
+        turns += 1
+        unshot = [(x, y) for y in range(game.GRID_SIZE) for x in range(game.GRID_SIZE)
+                  if (x, y) not in hunter.hits and (x, y) not in hunter.misses]
+        if hints and not hunter.open_hits:
+            # Hint: one ship cell and two empty ones, and the player picks one of them
+            hints -= 1
+            ship_cells = [cell for cell in unshot if cell in hunter.ships]
+            empty_cells = [cell for cell in unshot if cell not in hunter.ships]
+            shown = rng.sample(ship_cells, 1) + rng.sample(empty_cells, min(2, len(empty_cells)))
+            target = rng.choice(shown)
+        elif rng.random() < blind_chance:
+            target = rng.choice(unshot)
+        else:
+            target = hunter.best_target()
+        hunter.fire(target)
+    return turns
+
+
+def evaluate(params, games, seed):
+    """ Player wins out of games for one candidate. Runs in a worker process. """
+    rng = random.Random(seed)
+    random.seed(seed)  # choose_ai_targets uses the module-level RNG
+    game.AI_SHOT_OPTIONS = params["ai_shot_options"]
+    game.HIT_WEIGHT = params["hit_weight"]
+    game.LINE_BONUS = params["line_bonus"]
+    # No wall-clock limit on the endgame search, or results would depend on machine load
+    game.ENDGAME_SOLVER.time_budget = None
+
+    sizes = [size for size, _, _ in game.SHIPS.values()]
+    wins = 0
+    for _ in range(games):
+        player_turns = player_turns_to_win(ai_layout(sizes, rng), sizes, params, rng)
+        ai_turns = ai_turns_to_win(placement_heatmap.random_layout(game.GRID_SIZE, sizes, rng), sizes)
+        wins += player_turns <= ai_turns  # The player shoots first
+    return wins
+
+
+def load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_checkpoint(results, path):
+    # Write then rename, so an interrupted run never leaves a half-written checkpoint
+    with open(path + ".tmp", "w") as f:
+        json.dump(results, f)
+    os.replace(path + ".tmp", path)
+
+
+def pick_presets(results, targets=TARGET_WIN_RATES):
+    """ One candidate per difficulty, as close to the targets as possible overall.
+
+    Harder difficulties always get a strictly lower player win rate than easier ones, so
+    no two difficulties share a candidate or come out in the wrong order.
+    """
+    order = sorted(targets, key=targets.get, reverse=True)  # Easiest first
+    ranked = sorted(results.values(), key=lambda result: result["wins"] / result["games"], reverse=True)
+    rates = [result["wins"] / result["games"] for result in ranked]
+
+    # best[j]: (total error, picks) for the difficulties so far, the last one on ranked[j]
+    best = [(abs(rate - targets[order[0]]), [j]) for j, rate in enumerate(rates)]
+    for difficulty in order[1:]:
+        previous, best = best, []
+        for j, rate in enumerate(rates):
+            options = [previous[k] for k in range(j) if previous[k] is not None and rates[k] > rate]
+            if options:
+                error, picks = min(options, key=lambda option: option[0])
+                best.append((error + abs(rate - targets[difficulty]), picks + [j]))
+            else:
+                best.append(None)
+    finals = [entry for entry in best if entry is not None]
+    if not finals:
+        raise ValueError(f"need candidates with {len(order)} different win rates to order the difficulties")
+
+    presets = {}
+    for difficulty, j in zip(order, min(finals, key=lambda entry: entry[0])[1]):
+        preset = dict(ranked[j]["params"])
+        preset["win_rate"] = round(rates[j], 3)
+        presets[difficulty] = preset
+    return presets
+
+
+def tune(games, workers, seed, checkpoint=CHECKPOINT_PATH):
+    results = load_checkpoint(checkpoint)
+    todo = [params for params in candidates() if candidate_key(params) not in results]
+    print(f"{len(results)} candidates already evaluated, {len(todo)} to go")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for params in todo:
+            key = candidate_key(params)
+            # Seed from the candidate itself so resumed runs reproduce the same games
+            futures[pool.submit(evaluate, params, games, seed + zlib.crc32(key.encode()))] = params
+        for future in as_completed(futures):
+            params = futures[future]
+            results[candidate_key(params)] = {"params": params, "wins": future.result(), "games": games}
+            save_checkpoint(results, checkpoint)
+            print(f"[{len(results)}] {candidate_key(params)}: {future.result()}/{games}")
+
+    return pick_presets(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune difficulty presets by simulation")
+    parser.add_argument("--games", type=int, default=60, help="simulated games per candidate")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--output", default=game.PRESETS_PATH)
+    args = parser.parse_args()
+
+    presets = tune(args.games, args.workers, args.seed, args.checkpoint)
+    with open(args.output, "w") as f:
+        json.dump(presets, f, indent=2)
+    for difficulty, preset in presets.items():
+        print(f"{difficulty}: win rate {preset['win_rate']}")
+    print(f"Saved presets to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+""" Undo, redo and rewind-to-turn for a match, from per-turn diffs.
+
+GameState.emit() already reports every change to the board as it happens (the same
+events the spectator stream carries), so TurnHistory keeps just those: one small
+tuple per shot, fog change, hint or phase change, each holding what is needed to
+apply it in either direction. A fog change is a single bitmask of the cells that
+turned foggy or clear, so it costs the same however much of the board the fog
+covers. Memory grows with the moves made, not with snapshots of the grids, and
+moving to any turn replays only the changes in between.
+
+Turn 0 is the start of the playing phase; the game loop calls end_turn() after each
+AI reply. Ship placement, scores and animations are not part of the history.
+"""
+import bisect
+
+# Change kinds (first item of every change tuple)
+SHOT, FOG, HINT, PHASE = range(4)
+
+
+class TurnHistory:
+    def __init__(self, state):
+        self.state = state
+        self.changes = []  # Every recorded change, in order; the redo tail follows self.position
+        self.turn_starts = []  # Index into changes at which each turn begins
+        self.position = 0  # Number of changes currently applied to the state
+
+    @property
+    def turn(self):
+        """ Index of the turn the state is in, or None before the playing phase. """
+        turn = bisect.bisect_right(self.turn_starts, self.position) - 1
+        return turn if turn >= 0 else None
+
+    @property
+    def turns(self):
+        return len(self.turn_starts)
+
+    def record(self, kind, *args):
+        """ Called from GameState.emit() with every state change. """
+        if kind == "reset":
+            self.changes, self.turn_starts, self.position = [], [], 0
+            return
+        if kind == "phase" and args[0] == "playing" and not self.turn_starts:
+            self.turn_starts.append(0)
+            return
+        if not self.turn_starts:
+            return  # Setup isn't undoable
+
+        grid_size = len(self.state.ai_hits)
+        if kind == "shot":
+            board, x, y, result = args
+            change = (SHOT, board == "ai", y * grid_size + x, result)
+        elif kind == "fog":
+            added, removed = args
+            toggled = 0
+            for x, y in added | removed:
+                toggled |= 1 << (y * grid_size + x)
+            change = (FOG, toggled)
+        elif kind == "hint":
+            change = (HINT,)
+        elif kind == "phase":
+            change = (PHASE, self.previous_phase(), args[0])
+        else:
+            return
+
+        # A new move after an undo drops the redo tail
+        del self.changes[self.position:]
+        self.turn_starts = [start for start in self.turn_starts if start <= self.position]
+        self.changes.append(change)
+        self.position += 1
+
+    def previous_phase(self):
+        for change in reversed(self.changes[:self.position]):
+            if change[0] == PHASE:
+                return change[2]
+        return "playing"
+
+    def end_turn(self):
+        if self.turn_starts and self.turn_starts[-1] != self.position:
+            self.turn_starts.append(self.position)
+
+    def apply(self, change, forward):
+        state = self.state
+        grid_size = len(state.ai_hits)
+        kind = change[0]
+        if kind == SHOT:
+            _, ai_board, index, result = change
+            hits = state.player_hits if ai_board else state.ai_hits
+            hits[index // grid_size][index % grid_size] = result if forward else 0
+        elif kind == FOG:
+            # Added and removed cells are disjoint, so toggling them undoes the change as well
+            toggled = change[1]
+            cells = set()
+            while toggled:
+                bit = toggled & -toggled
+                index = bit.bit_length() - 1
+                cells.add((index % grid_size, index // grid_size))
+                toggled ^= bit
+            state.fog_positions.symmetric_difference_update(cells)
+        elif kind == HINT:
+            state.hint_uses += -1 if forward else 1
+        elif kind == PHASE:
+            state.game_phase = change[2] if forward else change[1]
+
+    def seek(self, turn):
+        """ Moves the state to the start of the given turn. """
+        if not 0 <= turn < len(self.turn_starts):
+            raise IndexError(f"turn {turn} out of range (0-{len(self.turn_starts) - 1})")
+        self.move_to(self.turn_starts[turn])
+
+    def move_to(self, position):
+        while self.position > position:
+            self.position -= 1
+            self.apply(self.changes[self.position], forward=False)
+        while self.position < position:
+            self.apply(self.changes[self.position], forward=True)
+            self.position += 1
+
+        state = self.state
+        state.player_turn = True
+        state.update_probability_map()
+        if state.stream is not None:
+            state.stream.publish("reset")  # Spectators resync from a fresh keyframe
+
+    def undo(self):
+        """ Back to the start of the current turn, or of the one before if nothing was played yet. """
+        turn = self.turn
+        if turn is None:
+            return False
+        if self.position == self.turn_starts[turn]:
+            if turn == 0:
+                return False
+            turn -= 1
+        self.seek(turn)
+        return True
+
+    def redo(self):
+        """ Forward to the start of the next turn, or as far as the last turn was played. """
+        turn = self.turn
+        if turn is None or self.position == len(self.changes):
+            return False
+        if turn + 1 < len(self.turn_starts):
+            self.seek(turn + 1)
+        else:
+            self.move_to(len(self.changes))
+        return True
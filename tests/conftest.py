@@ -0,0 +1,24 @@
+""" Shared test setup.
+
+The game modules load assets by paths relative to src/ on import, so tests run from
+there with the repo root on sys.path, and with SDL's dummy drivers and no sound.
+"""
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ["BATTLESHIPS_AUDIO"] = "null"
+sys.path.insert(0, ROOT)
+os.chdir(os.path.join(ROOT, "src"))
+
+
+@pytest.fixture
+def rng():
+    random.seed(1234)  # The game code uses the module-level RNG
+    return random.Random(1234)
@@ -0,0 +1,65 @@
+import threading
+
+import pygame
+import pytest
+
+from src import game
+from src.ai_worker import AIWorker
+
+
+@pytest.fixture
+def slow_ai(monkeypatch):
+    """ Replaces the AI with one that thinks until released or cancelled; yields (ticks, release, calls). """
+    ticks = [0]
+    release = threading.Event()
+    calls = []
+
+    def choose_ai_targets(state, cancel_event):
+        calls.append(cancel_event)
+        while not (release.is_set() or cancel_event.is_set()):
+            release.wait(0.001)
+        return [(0, 0)]
+
+    game.set_difficulty("EASY")
+    monkeypatch.setattr(pygame.time, "get_ticks", lambda: ticks[0])
+    monkeypatch.setattr(game, "choose_ai_targets", choose_ai_targets)
+    yield ticks, release, calls
+    release.set()
+
+
+def test_a_slow_turn_falls_back_within_budget(slow_ai):
+    ticks, release, calls = slow_ai
+    state = game.GameState()
+    worker = AIWorker(time_budget_ms=1000)
+    worker.start_turn(state)
+    ticks[0] = 1000
+    assert worker.poll(state) is None and worker.busy
+
+    ticks[0] = 1001
+    targets = worker.poll(state)
+    assert len(targets) == 1
+    x, y = targets[0]
+    assert state.ai_hits[y][x] == 0
+    assert calls[0].is_set()  # The search was told to stop
+    assert not worker.busy and worker.think_ms == 1001
+    worker.shutdown()
+
+
+def test_a_cancelled_turn_is_never_applied(slow_ai):
+    ticks, release, _ = slow_ai
+    state = game.GameState()
+    worker = AIWorker()
+    worker.start_turn(state)
+    cancel_event = worker.cancel_event
+    worker.cancel()  # Game over while the AI was thinking
+    assert cancel_event.is_set()
+    assert not worker.busy
+    ticks[0] = 5000  # Long past the budget: no fallback volley either
+    assert worker.poll(state) is None
+
+    # The next match gets a turn of its own
+    release.set()
+    worker.start_turn(state)
+    assert worker.executor.submit(lambda: None).result() is None  # The worker has run it
+    assert worker.poll(state) == [(0, 0)]
+    worker.shutdown()
@@ -0,0 +1,46 @@
+import pygame
+import pytest
+
+from src import audio
+from src.audio import MixerAudio, NullAudio
+
+
+@pytest.fixture
+def mixer():
+    mixer_audio = MixerAudio(pools={"explosion": 2, "splash": 1})
+    yield mixer_audio
+    pygame.mixer.quit()
+
+
+def long_sound(value):
+    # A few seconds of a constant sample, so the voice is still playing when the pool fills up
+    return pygame.mixer.Sound(buffer=bytes([value]) * 400000)
+
+
+def test_a_full_pool_cuts_off_its_oldest_voice(mixer):
+    sounds = {name: long_sound(value) for value, name in enumerate(["first", "second", "third", "splash"])}
+    for name, sound in sounds.items():
+        mixer.sounds[name] = (sound, "splash" if name == "splash" else "explosion")
+    for name in ["first", "second", "splash"]:
+        mixer.play(name)
+    assert all(channel.get_busy() for pool in mixer.pools.values() for channel in pool)
+
+    mixer.play("third")
+    playing = [channel.get_sound() for channel in mixer.pools["explosion"]]
+    assert playing == [sounds["third"], sounds["second"]]
+    assert mixer.pools["splash"][0].get_sound() is sounds["splash"]  # Other categories keep their voices
+
+    mixer.play("first")  # The oldest voice is now "second"
+    assert [channel.get_sound() for channel in mixer.pools["explosion"]] == [sounds["third"], sounds["first"]]
+
+
+def test_null_audio_never_touches_the_mixer():
+    pygame.mixer.quit()
+    assert audio.get_audio().name == "null"  # BATTLESHIPS_AUDIO=null, set in conftest
+    null = NullAudio()
+    null.load("explosion", "missing.wav", "explosion")
+    null.play("explosion")
+    null.play_music("missing.mid")
+    null.stop_music()
+    null.restart_music()
+    assert pygame.mixer.get_init() is None
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from src import batch_ai, game, opening_book
+
+
+def random_boards(rng, count):
+    """ Hit grids with scattered shots, and some with ships hit along a line. """
+    boards = []
+    for i in range(count):
+        hits = [[rng.choice((0, 0, 0, 1, 2)) if i % 2 else 0 for _ in range(game.GRID_SIZE)]
+                for _ in range(game.GRID_SIZE)]
+        for _ in range(rng.randrange(4)):
+            x, y, length = rng.randrange(game.GRID_SIZE), rng.randrange(game.GRID_SIZE), rng.randint(2, 5)
+            dx, dy = rng.choice([(1, 0), (0, 1)])
+            for step in range(length):
+                if x + step * dx < game.GRID_SIZE and y + step * dy < game.GRID_SIZE:
+                    hits[y + step * dy][x + step * dx] = 2
+        boards.append(hits)
+    return boards
+
+
+@pytest.mark.parametrize("hit_weight, line_bonus", [(10, 0), (10, 5), (7, 20)])
+def test_probability_maps_match_the_game(rng, monkeypatch, hit_weight, line_bonus):
+    monkeypatch.setattr(game, "HIT_WEIGHT", hit_weight)
+    monkeypatch.setattr(game, "LINE_BONUS", line_bonus)
+    boards = random_boards(rng, 40)
+    maps = batch_ai.probability_maps(np.array(boards, dtype=np.int8))
+    assert maps.tolist() == [game.compute_probability_map(hits) for hits in boards]
+
+
+def test_shots_follow_the_game_policy(rng):
+    boards = random_boards(rng, 40)
+    boards.append([[1] * game.GRID_SIZE for _ in range(game.GRID_SIZE)])  # Nothing left to fire at
+    book_exhausted = [[0] * game.GRID_SIZE for _ in range(game.GRID_SIZE)]
+    book = opening_book.load_opening_book(game.GRID_SIZE, [size for size, _, _ in game.SHIPS.values()])
+    for x, y in book:
+        book_exhausted[y][x] = 1
+    boards.append(book_exhausted)
+
+    hits = np.array(boards, dtype=np.int8)
+    books = batch_ai.book_indices(game.GRID_SIZE, [size for size, _, _ in game.SHIPS.values()])[[0] * len(boards)]
+    shots = batch_ai.choose_shots(hits, batch_ai.probability_maps(hits), books, np.random.default_rng(0))
+
+    for board, shot in zip(boards, shots.tolist()):
+        probability = game.compute_probability_map(board)
+        unshot = [(x, y) for y in range(game.GRID_SIZE) for x in range(game.GRID_SIZE) if board[y][x] == 0]
+        best = max(probability[y][x] for x, y in unshot) if unshot else 0
+        if best > 0:
+            expected = {(x, y) for x, y in unshot if probability[y][x] == best}
+        elif opening_book.next_book_shot(book, board) is not None:
+            expected = {opening_book.next_book_shot(book, board)}
+        else:
+            expected = set(unshot)
+        if not expected:
+            assert shot == batch_ai.NO_SHOT
+        else:
+            assert (shot % game.GRID_SIZE, shot // game.GRID_SIZE) in expected
@@ -0,0 +1,120 @@
+import functools
+import itertools
+import random
+import threading
+import time
+
+import pytest
+
+from src import endgame
+from src.endgame import EndgameSolver
+
+
+def ship_masks(grid_size, size):
+    masks = set()
+    for y, x in itertools.product(range(grid_size), repeat=2):
+        if x + size <= grid_size:
+            masks.add(sum(1 << (y * grid_size + x + i) for i in range(size)))
+        if y + size <= grid_size:
+            masks.add(sum(1 << ((y + i) * grid_size + x) for i in range(size)))
+    return masks
+
+
+def brute_layouts(grid_size, ship_sizes, hit_mask, miss_mask):
+    """ Every fleet layout, one ship after the other, filtered by the shots afterwards. """
+    layouts = {}
+    for fleet in itertools.product(*(ship_masks(grid_size, size) for size in ship_sizes)):
+        occupied = 0
+        for mask in fleet:
+            if mask & occupied:
+                break
+            occupied |= mask
+        else:
+            if occupied & hit_mask == hit_mask and not occupied & miss_mask:
+                layouts[occupied] = layouts.get(occupied, 0) + 1
+    return layouts
+
+
+@functools.lru_cache(maxsize=None)
+def brute_expected(layouts):
+    """ Fewest expected shots to find every unfound cell, trying every cell at every step. """
+    layouts = dict(layouts)
+    if len(layouts) == 1:
+        return bin(next(iter(layouts))).count("1")
+    total = sum(layouts.values())
+    possible = functools.reduce(lambda a, b: a | b, layouts)
+    best = float("inf")
+    for cell in range(possible.bit_length()):
+        bit = 1 << cell
+        if not possible & bit:
+            continue
+        on_hit = frozenset((remaining ^ bit, count) for remaining, count in layouts.items() if remaining & bit)
+        on_miss = frozenset((remaining, count) for remaining, count in layouts.items() if not remaining & bit)
+        p_hit = sum(count for _, count in on_hit) / total
+        best = min(best, 1 + (p_hit * brute_expected(on_hit) if on_hit else 0)
+                   + ((1 - p_hit) * brute_expected(on_miss) if on_miss else 0))
+    return best
+
+
+def endgames(grid_size, ship_sizes, count, seed):
+    """ (hits grid, hit_mask, miss_mask) of random games played until the endgame search takes over. """
+    rng = random.Random(seed)
+    cells = list(ship_masks(grid_size, 1))
+    while count:
+        fleet = rng.choice(list(brute_layouts(grid_size, ship_sizes, 0, 0)))
+        hits = [[0] * grid_size for _ in range(grid_size)]
+        for bit in rng.sample(cells, rng.randrange(len(cells) // 2)):
+            cell = bit.bit_length() - 1
+            hits[cell // grid_size][cell % grid_size] = 2 if fleet & bit else 1
+        hit_mask, miss_mask = endgame.board_masks(hits, grid_size)
+        if hit_mask != fleet:
+            count -= 1
+            yield hits, hit_mask, miss_mask
+
+
+def test_layouts_match_brute_force():
+    for hits, hit_mask, miss_mask in endgames(4, [3, 2, 2], 30, seed=1):
+        layouts = endgame.consistent_layouts(4, [3, 2, 2], hit_mask, miss_mask, 10 ** 6, lambda: False)
+        assert layouts == brute_layouts(4, [3, 2, 2], hit_mask, miss_mask)
+
+
+def test_best_shot_is_optimal():
+    for hits, hit_mask, miss_mask in endgames(4, [3, 2], 40, seed=2):
+        unfound = {}
+        for occupied, count in brute_layouts(4, [3, 2], hit_mask, miss_mask).items():
+            unfound[occupied & ~hit_mask] = unfound.get(occupied & ~hit_mask, 0) + count
+        if len(unfound) > endgame.ENDGAME_EXACT_MAX:
+            continue
+        x, y = EndgameSolver(time_budget=None).best_shot(hits, 4, [3, 2])
+        assert hits[y][x] == 0
+        # Firing there and playing on perfectly is as good as the best first shot
+        bit = 1 << (y * 4 + x)
+        total = sum(unfound.values())
+        on_hit = frozenset((remaining ^ bit, count) for remaining, count in unfound.items() if remaining & bit)
+        on_miss = frozenset((remaining, count) for remaining, count in unfound.items() if not remaining & bit)
+        p_hit = sum(count for _, count in on_hit) / total
+        expected = 1 + (p_hit * brute_expected(on_hit) if on_hit else 0) \
+            + ((1 - p_hit) * brute_expected(on_miss) if on_miss else 0)
+        assert expected == pytest.approx(brute_expected(frozenset(unfound.items())))
+
+
+def test_open_positions_are_left_to_the_probability_map():
+    hits = [[0] * 10 for _ in range(10)]
+    assert EndgameSolver().best_shot(hits, 10, [5, 4, 3, 3, 2]) is None
+
+
+@pytest.mark.parametrize("stop", ["deadline", "cancel"])
+def test_search_stops_when_asked(stop):
+    # Every ship found but the carrier, which can still be almost anywhere (about 0.2s to solve)
+    hits = [[0] * 10 for _ in range(10)]
+    for x, y in [(0, 0), (0, 1), (0, 2), (0, 3), (2, 0), (2, 1), (2, 2), (4, 0), (4, 1), (4, 2), (6, 0), (7, 0)]:
+        hits[y][x] = 2
+    cancel_event = threading.Event()
+    deadline = None
+    if stop == "deadline":
+        deadline = time.perf_counter()
+    else:
+        cancel_event.set()
+    started = time.perf_counter()
+    EndgameSolver().best_shot(hits, 10, [5, 4, 3, 3, 2], cancel_event, deadline)
+    assert time.perf_counter() - started < 0.1
@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from src import fleet_solver
+
+
+def ship_cells(placement, size):
+    row, col, orientation = placement
+    return {(col + i, row) if orientation == 'H' else (col, row + i) for i in range(size)}
+
+
+def touching(cells, grid_size):
+    return {(x + dx, y + dy) for x, y in cells for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+            if 0 <= x + dx < grid_size and 0 <= y + dy < grid_size}
+
+
+def placements(grid_size, size):
+    return [(row, col, orientation) for orientation in "HV" for row in range(grid_size) for col in range(grid_size)
+            if all(x < grid_size and y < grid_size for x, y in ship_cells((row, col, orientation), size))]
+
+
+def fits(grid_size, ship_sizes, no_touch, blocked=frozenset()):
+    """ Brute force: whether the ships can be placed one after the other in some way. """
+    if not ship_sizes:
+        return True
+    size = ship_sizes[0]
+    for placement in placements(grid_size, size):
+        cells = ship_cells(placement, size)
+        if not cells & blocked:
+            taken = touching(cells, grid_size) if no_touch else cells
+            if fits(grid_size, ship_sizes[1:], no_touch, blocked | taken):
+                return True
+    return False
+
+
+def assert_valid(layout, grid_size, ship_sizes, no_touch):
+    assert len(layout) == len(ship_sizes)
+    blocked = set()
+    for placement, size in zip(layout, ship_sizes):
+        assert placement in placements(grid_size, size)
+        cells = ship_cells(placement, size)
+        assert not cells & blocked
+        blocked |= touching(cells, grid_size) if no_touch else cells
+
+
+def test_agrees_with_brute_force_on_small_grids():
+    rng = random.Random(1)
+    for trial in range(300):
+        grid_size, no_touch = rng.randint(3, 5), rng.random() < 0.5
+        # Sorted largest first, so the brute force fails fast; the solver gets them shuffled
+        ship_sizes = sorted((rng.randint(1, min(grid_size, 4)) for _ in range(rng.randint(1, 6))), reverse=True)
+        expected = fits(grid_size, ship_sizes, no_touch)
+        shuffled = rng.sample(ship_sizes, len(ship_sizes))
+        try:
+            layout = fleet_solver.solve_fleet(grid_size, shuffled, no_touch, random.Random(trial))
+        except fleet_solver.PlacementError as error:
+            assert not expected, (grid_size, shuffled, no_touch, str(error))
+            # Infeasibility is proven, not a search that ran out of nodes
+            assert "search nodes" not in str(error)
+        else:
+            assert expected, (grid_size, shuffled, no_touch)
+            assert_valid(layout, grid_size, shuffled, no_touch)
+
+
+@pytest.mark.parametrize("grid_size, ship_sizes", [
+    (4, [4, 4, 4, 4]),
+    (4, [1] * 16),
+    (5, [5, 4, 4, 3, 3, 2, 2, 1, 1]),
+    (6, [3] * 12),
+])
+def test_fills_a_board_exactly(grid_size, ship_sizes):
+    layout = fleet_solver.solve_fleet(grid_size, ship_sizes, rng=random.Random(0))
+    assert_valid(layout, grid_size, ship_sizes, False)
+
+
+@pytest.mark.parametrize("grid_size, ship_sizes", [(3, [1] * 4), (5, [1] * 9), (4, [2] * 4)])
+def test_equal_ships_fill_tight_no_touch_boards(grid_size, ship_sizes):
+    # Few layouts exist; skipping any ordering of the equal ships would lose some of them
+    for seed in range(20):
+        layout = fleet_solver.solve_fleet(grid_size, ship_sizes, True, random.Random(seed))
+        assert_valid(layout, grid_size, ship_sizes, True)
+
+
+def test_proves_that_a_fleet_fitting_by_area_does_not_fit():
+    assert not fits(4, [3] * 3, True)
+    with pytest.raises(fleet_solver.PlacementError, match="no layout exists"):
+        fleet_solver.solve_fleet(4, [3] * 3, True, random.Random(0))
+
+
+def test_rejects_oversized_fleets_without_searching():
+    with pytest.raises(fleet_solver.PlacementError, match="needs 17 cells"):
+        fleet_solver.check_fleet(4, [1] * 17)
+    with pytest.raises(fleet_solver.PlacementError, match="size 5"):
+        fleet_solver.check_fleet(4, [5])
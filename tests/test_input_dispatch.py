@@ -0,0 +1,15 @@
+from src import input_dispatch
+from src.input_dispatch import LatencyTracker
+
+
+def test_latency_counts_the_wait_in_the_event_queue(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(input_dispatch.time, "perf_counter", lambda: now[0])
+    latency = LatencyTracker()
+    latency.polled()  # Frame 1 drains an empty queue at 0 ms
+    now[0] = 0.030
+    latency.polled()  # Frame 2 finds a click that arrived some time after 0 ms
+    latency.mark(latency.stamp(), "shot")
+    now[0] = 0.040
+    latency.presented()
+    assert latency.worst["shot"] == 40
@@ -0,0 +1,27 @@
+import sqlite3
+
+from src import match_history
+from src.match_history import Match, MatchHistory
+
+
+def test_leaderboard_reads_only_its_index(tmp_path):
+    path = str(tmp_path / "history.sqlite")
+    # A database from before the covering index
+    connection = sqlite3.connect(path)
+    connection.executescript(match_history.SCHEMA)
+    connection.execute("CREATE INDEX matches_leaderboard ON matches (source, difficulty, won, shots, duration)")
+    connection.close()
+
+    history = MatchHistory(path)
+    history.record(Match("HARD", True, 40, 1, 90.0, 12.0))
+    history.record(Match("HARD", True, 35, 0, 120.0, 9.0))
+    history.record(Match("HARD", False, 60, 2, 80.0, 15.0))
+    history.close()
+
+    assert [row[1:] for row in history.leaderboard("HARD")] == [(35, 120.0, 0), (40, 90.0, 1)]
+    indexes = {name for name, in history.query("SELECT name FROM sqlite_master WHERE type = 'index'", ())}
+    assert "matches_leaderboard" not in indexes
+    plan = history.query(
+        "EXPLAIN QUERY PLAN SELECT played_at, shots, duration, hints_used FROM matches "
+        "WHERE source = ? AND difficulty = ? AND won = 1 ORDER BY shots, duration LIMIT ?", ("player", "HARD", 10))
+    assert any("COVERING INDEX matches_ranking" in row[-1] for row in plan)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from src import batch_ai, game, opening_book
+
+
+def fleet_sizes():
+    return [size for size, _, _ in game.SHIPS.values()]
+
+
+def test_every_symmetry_is_as_dense_as_the_book():
+    density = opening_book.placement_density(game.GRID_SIZE, fleet_sizes(), set())
+    books = [opening_book.load_opening_book(game.GRID_SIZE, fleet_sizes(), symmetry)
+             for symmetry in range(opening_book.BOOK_SYMMETRIES)]
+    assert len({tuple(book) for book in books}) == opening_book.BOOK_SYMMETRIES
+    for book in books:
+        assert len(set(book)) == len(book)
+        assert [density[y][x] for x, y in book] == [density[y][x] for x, y in books[0]]
+
+
+def test_matches_open_with_different_shots(rng):
+    game.set_difficulty("EASY")
+    openings = set()
+    for _ in range(20):
+        state = game.GameState()
+        openings.add(tuple(game.choose_ai_targets(state)[:1]))
+    assert len(openings) > 1
+
+
+def test_batched_ai_opens_like_the_game(rng):
+    game.set_difficulty("EASY")
+    states = [game.GameState() for _ in range(opening_book.BOOK_SYMMETRIES)]
+    for symmetry, state in enumerate(states):
+        state.book_symmetry = symmetry
+    hits, occupied = batch_ai.stack_states(states)
+    targets = batch_ai.batch_ai_targets(hits, occupied, [1] * len(states), [state.book_symmetry for state in states],
+                                        np.random.default_rng(0))
+    assert [(cell % game.GRID_SIZE, cell // game.GRID_SIZE) for cell in targets[:, 0]] == \
+        [game.choose_ai_targets(state)[0] for state in states]
+
+
+@pytest.mark.parametrize("data", [b"\x05", b"\x05\x00\x07", b"\xff\xff"])
+def test_a_damaged_book_is_generated_again(tmp_path, monkeypatch, data):
+    monkeypatch.setattr(opening_book, "OPENING_BOOK_DIR", str(tmp_path))
+    monkeypatch.setattr(opening_book, "_books", {})
+    with open(opening_book.book_path(game.GRID_SIZE, fleet_sizes()), "wb") as f:
+        f.write(data)
+    assert opening_book.load_opening_book(game.GRID_SIZE, fleet_sizes()) == \
+        opening_book.generate_opening_book(game.GRID_SIZE, fleet_sizes())
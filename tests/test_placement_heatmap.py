@@ -0,0 +1,53 @@
+import itertools
+
+from src import fleet_solver, game, placement_heatmap
+
+
+class Symmetry:
+    """ Stands in for the RNG of transform_layout: answers its three coin flips as given. """
+
+    def __init__(self, flips):
+        self.flips = iter(flips)
+
+    def random(self):
+        return 0.0 if next(self.flips) else 0.9
+
+
+def fleet_sizes():
+    return [ship.size for ship in game.GameState().ships]
+
+
+def assert_valid_fleet(layout, sizes):
+    taken = set()
+    for (row, col, orientation), size in zip(layout, sizes):
+        cells = placement_heatmap.ship_cells(row, col, orientation, size)
+        assert all(0 <= x < game.GRID_SIZE and 0 <= y < game.GRID_SIZE for x, y in cells)
+        assert not taken & set(cells)
+        taken.update(cells)
+    assert len(taken) == sum(sizes)
+
+
+def test_every_pool_layout_stays_valid_under_every_symmetry():
+    game.set_difficulty("EASY")
+    sizes = fleet_sizes()
+    pool = placement_heatmap.load_layout_pool(game.GRID_SIZE, sizes)
+    assert len(pool) == placement_heatmap.POOL_SIZE
+    for layout, flips in itertools.product(pool, itertools.product((False, True), repeat=3)):
+        assert_valid_fleet(placement_heatmap.transform_layout(layout, game.GRID_SIZE, sizes, Symmetry(flips)), sizes)
+
+
+def test_ai_fleet_is_solved_when_there_is_no_pool(tmp_path, monkeypatch):
+    game.set_difficulty("EASY")
+    monkeypatch.setattr(placement_heatmap, "POOL_DIR", str(tmp_path))
+    monkeypatch.setattr(placement_heatmap, "_pools", {})
+    solved = []
+    solve_fleet = fleet_solver.solve_fleet
+    monkeypatch.setattr(fleet_solver, "solve_fleet", lambda *args: solved.append(solve_fleet(*args)) or solved[-1])
+
+    state = game.GameState()
+    state.place_ai_ships()
+    assert len(solved) == 1
+    assert_valid_fleet(solved[0], fleet_sizes())
+    for ship, (row, col, orientation) in zip(state.ships, solved[0]):
+        cells = placement_heatmap.ship_cells(row, col, orientation, ship.size)
+        assert all(state.ai_board[y][x] is ship for x, y in cells)
@@ -0,0 +1,72 @@
+import itertools
+from types import SimpleNamespace
+
+import pygame
+
+from src import endgame, game, playback
+
+
+def script():
+    """ {frame: [event]}: pick a difficulty, place the fleet, fire at every cell of the AI board, quit. """
+    frames = itertools.count(3, 3)
+    events = {next(frames): [(pygame.MOUSEBUTTONDOWN, dict(pos=(640, 395), button=1))],
+              next(frames): [(pygame.MOUSEBUTTONDOWN, dict(pos=(640, 245), button=1))]}
+    for i in range(5):
+        pos = (60, 60 + i * 82)
+        events[next(frames)] = [(pygame.MOUSEMOTION, dict(pos=pos, rel=(0, 0), buttons=(0, 0, 0))),
+                                (pygame.MOUSEBUTTONDOWN, dict(pos=pos, button=1))]
+    cells = game.GRID_SIZE ** 2
+    for cell in range(cells):
+        x, y = divmod(cell * 37 % cells, game.GRID_SIZE)
+        pos = (game.AI_OFFSET + x * (game.CELL_SIZE + game.MARGIN) + 5,
+               game.PLAYER_OFFSET + y * (game.CELL_SIZE + game.MARGIN) + 5)
+        events[next(frames) * 2] = [(pygame.MOUSEBUTTONDOWN, dict(pos=pos, button=1))]
+    events[max(events) + 30] = [(pygame.QUIT, {})]
+    return events
+
+
+def states_played(monkeypatch, run):
+    """ Every GameState of a session, as plain data. """
+    states = []
+
+    class TrackedState(game.GameState):
+        def __init__(self):
+            super().__init__()
+            states.append(self)
+
+    monkeypatch.setattr(game, "GameState", TrackedState)
+    run()
+    ships = lambda board: [[cell.name if cell is not None else None for cell in row] for row in board]
+    return [(ships(state.player_board), ships(state.ai_board), state.player_hits, state.ai_hits,
+             state.fog_positions, state.hint_uses, state.game_phase, state.player_score, state.ai_score)
+            for state in states]
+
+
+def test_a_recorded_session_replays_to_the_same_state(monkeypatch, tmp_path):
+    # Quitting would free the fonts the menu keeps between runs; both runs share this process
+    monkeypatch.setattr(pygame, "quit", lambda: None)
+    monkeypatch.setattr(game.ENDGAME_SOLVER, "time_budget", game.ENDGAME_SOLVER.time_budget)
+    session = str(tmp_path / "session.json")
+    events = script()
+    get_events = playback.RecordingScenes.get_events
+
+    def scripted_events(scenes):
+        for kind, fields in events.get(scenes.frame + 1, []):
+            pygame.event.post(pygame.event.Event(kind, fields))
+        return get_events(scenes)
+
+    with monkeypatch.context() as recording:
+        recording.setattr(playback.RecordingScenes, "get_events", scripted_events)
+        recording.setattr(pygame.time, "Clock", playback.FastClock)
+        recording.setattr(pygame.time, "delay", lambda ms: None)
+        # A machine far too slow for any wall-clock deadline or the AI worker's time budget
+        clock = itertools.count(step=1000)
+        recording.setattr(endgame.time, "perf_counter", lambda: next(clock))
+        ticks = itertools.count(step=1000)
+        recording.setattr(pygame.time, "get_ticks", lambda: next(ticks))
+        recorded = states_played(recording, lambda: playback.record(SimpleNamespace(session=session, seed=7)))
+
+    replayed = states_played(monkeypatch, lambda: playback.play(
+        SimpleNamespace(session=session, profile="none", stats=None, interval=5)))
+    assert len(recorded) > 1  # Played to the end, so the endgame search ran
+    assert replayed == recorded
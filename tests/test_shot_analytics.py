@@ -0,0 +1,90 @@
+import pytest
+
+from src import shot_analytics
+from src.shot_analytics import DecayedCounters, ShotAnalytics
+
+
+def play_match(analytics, cells, won=True):
+    analytics.start_game()
+    for x, y in cells:
+        analytics.record_shot(x, y, hit=x == y)
+    analytics.end_game(won)
+
+
+def test_counts_halve_after_a_half_life():
+    counters = DecayedCounters(2, half_life=10)
+    counters.add(0)
+    for _ in range(10):
+        counters.tick()
+    counters.add(1)
+    assert counters.totals() == pytest.approx([0.5, 1.0])
+
+
+def test_rescaling_keeps_the_totals(monkeypatch):
+    monkeypatch.setattr(shot_analytics, "RESCALE_LIMIT", 4.0)
+    counters = DecayedCounters(1, half_life=1)
+    counters.add(0)
+    for _ in range(5):
+        counters.tick()
+    assert counters.weight <= 4.0
+    assert counters.get(0) == pytest.approx(0.5 ** 5)
+
+
+def test_only_finished_matches_are_counted():
+    analytics = ShotAnalytics(4)
+    analytics.start_game()
+    analytics.record_hint()
+    analytics.record_shot(3, 3, hit=True)  # Quit before the end
+    play_match(analytics, [(0, 0), (1, 2)])
+    assert analytics.shot_heatmap()[15] == 0
+    stats = analytics.hint_stats()
+    assert stats["games"] == pytest.approx(0.5 ** (1 / shot_analytics.GAME_HALF_LIFE))  # One match
+    assert stats["hints_per_game"] == 0
+
+
+def test_early_heatmap_needs_enough_matches(monkeypatch):
+    monkeypatch.setattr(shot_analytics, "EARLY_SHOTS", 1)
+    analytics = ShotAnalytics(4)
+    # Each match counts a little less than one as soon as it is over
+    for _ in range(shot_analytics.MIN_GAMES):
+        play_match(analytics, [(1, 1), (2, 2)])
+    assert analytics.early_heatmap() is None
+    play_match(analytics, [(1, 1), (2, 2)])
+    heatmap = analytics.early_heatmap()
+    assert heatmap[5] == pytest.approx(1.0) and heatmap[10] == 0
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "analytics.bin")
+    analytics = ShotAnalytics(4, path)
+    for _ in range(4):
+        analytics.start_game()
+        analytics.record_hint()
+        analytics.record_shot(1, 1, hit=True, hinted=True)
+        analytics.record_shot(2, 3, hit=False)
+        analytics.end_game(won=True)
+    analytics.save()
+
+    loaded = shot_analytics.load_shot_analytics(4, path)
+    assert loaded.shot_heatmap() == pytest.approx(analytics.shot_heatmap())
+    assert loaded.early_heatmap() == pytest.approx(analytics.early_heatmap())
+    assert loaded.hint_stats() == pytest.approx(analytics.hint_stats())
+
+
+@pytest.mark.parametrize("damage", ["truncated", "odd length", "other grid", "not a checkpoint"])
+def test_damaged_checkpoints_leave_the_counters_empty(tmp_path, damage):
+    path = tmp_path / "analytics.bin"
+    analytics = ShotAnalytics(4, str(path))
+    play_match(analytics, [(0, 0)])
+    analytics.save()
+    data = path.read_bytes()
+    path.write_bytes({
+        "truncated": data[:-8],
+        "odd length": data[:-3],
+        "other grid": data,
+        "not a checkpoint": b"\0" * len(data),
+    }[damage])
+
+    loaded = ShotAnalytics(5 if damage == "other grid" else 4, str(path))
+    assert not loaded.load()
+    assert loaded.hint_stats()["games"] == 0
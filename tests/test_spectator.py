@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from src import game, spectator
+
+
+def play(state, rng, shots):
+    """ Places the player's fleet, then trades shots (with a hint every few turns). """
+    while state.game_phase == "setup":
+        ship = state.ships[state.current_ship]
+        ship.orientation = rng.choice("HV")
+        cell = (rng.randrange(game.GRID_SIZE), rng.randrange(game.GRID_SIZE))
+        if game.placement_is_valid(state, cell):
+            game.place_current_ship(state, cell[1], cell[0])
+    for turn in range(shots):
+        if turn % 7 == 3 and state.hint_uses:
+            state.hint_uses -= 1
+            state.emit("hint", game.pick_hint_positions(state))
+        free = [(x, y) for y in range(game.GRID_SIZE) for x in range(game.GRID_SIZE) if state.player_hits[y][x] == 0]
+        game.apply_player_shot(state, *rng.choice(free))
+        for x, y in game.choose_ai_targets(state):
+            game.apply_ai_shot(state, x, y)
+        state.player_turn = True
+
+
+def assert_mirrors(view, state):
+    assert view.synced
+    assert view.player_hits == state.player_hits
+    assert view.ai_hits == state.ai_hits
+    assert view.fog_positions == state.fog_positions
+    assert view.hint_uses == state.hint_uses
+    assert view.game_phase == state.game_phase
+    ships = [[cell is not None for cell in row] for row in state.player_board]
+    assert [[cell is not None for cell in row] for row in view.player_board] == ships
+
+
+@pytest.fixture
+def match(rng):
+    game.set_difficulty("HARD")
+    state = game.GameState()
+    state.place_ai_ships()
+    publisher = spectator.StreamPublisher()
+    publisher.attach(state, "HARD")
+    return state, publisher
+
+
+def test_keyframe_round_trip(match, rng):
+    state, publisher = match
+    play(state, rng, 20)
+    view = spectator.SpectatorState()
+    view.apply(spectator.encode_keyframe(state, "HARD", game.GRID_SIZE))
+    assert_mirrors(view, state)
+    assert view.difficulty == "HARD"
+    assert view.max_ai_shots == max(game.AI_SHOT_OPTIONS)
+
+
+def test_deltas_rebuild_the_match(match, rng):
+    state, publisher = match
+    subscriber = publisher.subscribe(max_queue=100000)
+    view = spectator.SpectatorState()
+    for _ in range(3):
+        play(state, rng, 10)
+        for message in subscriber.poll():
+            view.apply(message)
+        assert_mirrors(view, state)
+    assert subscriber.dropped == 0
+
+
+def test_late_subscriber_starts_from_a_keyframe(match, rng):
+    state, publisher = match
+    play(state, rng, 15)
+    subscriber = publisher.subscribe()
+    play(state, rng, 5)
+    view = spectator.SpectatorState()
+    for message in subscriber.poll():
+        view.apply(message)
+    assert_mirrors(view, state)
+
+
+def test_overflow_resyncs_to_the_current_state(match, rng):
+    state, publisher = match
+    subscriber = publisher.subscribe(max_queue=10)
+    play(state, rng, 30)
+    view = spectator.SpectatorState()
+    for message in subscriber.poll():
+        view.apply(message)
+    assert subscriber.dropped > 0
+    assert_mirrors(view, state)
+
+
+def test_socket_transport(match, rng):
+    state, publisher = match
+    server = spectator.StreamServer(publisher, port=0)
+    client = spectator.SocketSubscriber(port=server.port)
+    try:
+        deadline = time.monotonic() + 5
+        while not publisher.subscribers:
+            assert time.monotonic() < deadline, "spectator never connected"
+            publisher.admit_waiting()  # Done by the game loop every frame
+            time.sleep(0.01)
+        play(state, rng, 25)
+
+        view = spectator.SpectatorState()
+        while view.ai_hits != state.ai_hits or view.player_hits != state.player_hits:
+            assert time.monotonic() < deadline, "stream never caught up"
+            for message in client.poll():
+                view.apply(message)
+            time.sleep(0.01)
+        assert_mirrors(view, state)
+    finally:
+        client.socket.close()
+        server.close()
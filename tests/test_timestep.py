@@ -0,0 +1,21 @@
+import pytest
+
+from src.timestep import FixedTimestep
+
+
+def test_leftover_time_carries_over_to_the_next_frame():
+    timestep = FixedTimestep(20)
+    assert timestep.advance(33) == 1
+    assert timestep.alpha == pytest.approx(13 / 20)
+    assert timestep.advance(33) == 2  # 13 + 33 ms
+    assert timestep.alpha == pytest.approx(6 / 20)
+    assert timestep.advance(14) == 1
+    assert timestep.alpha == 0
+
+
+def test_a_long_stall_runs_at_most_max_steps():
+    timestep = FixedTimestep(20)
+    assert timestep.advance(1005) == 10
+    # The steps beyond the clamp are dropped, not owed to later frames
+    assert timestep.alpha == pytest.approx(5 / 20)
+    assert timestep.advance(20) == 1
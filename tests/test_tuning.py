@@ -0,0 +1,68 @@
+import itertools
+
+import pytest
+
+from src import endgame, tuning
+
+
+def results(*win_rates):
+    return {str(i): {"params": {"id": i}, "wins": round(rate * 100), "games": 100}
+            for i, rate in enumerate(win_rates)}
+
+
+def test_each_difficulty_gets_the_closest_candidate():
+    presets = tuning.pick_presets(results(0.9, 0.71, 0.52, 0.33, 0.1))
+    assert {difficulty: preset["id"] for difficulty, preset in presets.items()} == \
+        {"EASY": 1, "MEDIUM": 2, "HARD": 3}
+
+
+def test_difficulties_never_share_a_candidate():
+    # Every target is closest to the same candidate on its own
+    presets = tuning.pick_presets(results(0.5, 0.2, 0.1))
+    ids = [presets[difficulty]["id"] for difficulty in ("EASY", "MEDIUM", "HARD")]
+    assert ids == [0, 1, 2]
+
+
+def test_harder_difficulties_have_lower_win_rates():
+    presets = tuning.pick_presets(results(0.95, 0.45, 0.44, 0.43, 0.05))
+    assert presets["EASY"]["win_rate"] > presets["MEDIUM"]["win_rate"] > presets["HARD"]["win_rate"]
+
+
+def test_equal_win_rates_cannot_be_ordered():
+    with pytest.raises(ValueError):
+        tuning.pick_presets(results(0.5, 0.5, 0.5))
+
+
+def test_difficulty_without_a_preset_drops_tuned_weights(tmp_path, monkeypatch):
+    path = tmp_path / "presets.json"
+    path.write_text('{"HARD": {"ai_shot_options": [1, 2], "max_hints": 1, "enable_fog": false,'
+                    ' "hit_weight": 7, "line_bonus": 20}}')
+    monkeypatch.setattr(tuning.game, "PRESETS_PATH", str(path))
+    tuning.game.set_difficulty("HARD")
+    assert (tuning.game.HIT_WEIGHT, tuning.game.LINE_BONUS) == (7, 20)
+    tuning.game.set_difficulty("EASY")
+    assert (tuning.game.HIT_WEIGHT, tuning.game.LINE_BONUS) == \
+        (tuning.game.DEFAULT_HIT_WEIGHT, tuning.game.DEFAULT_LINE_BONUS)
+
+
+def test_evaluation_only_depends_on_the_seed(monkeypatch):
+    params = next(tuning.candidates({"ai_shot_options": [[1, 2, 3]], "max_hints": [1], "fog_size": [None],
+                                     "hit_weight": [10], "line_bonus": [5]}))
+    choose_ai_targets = tuning.game.choose_ai_targets
+    # evaluate() changes the game's settings for good, as it runs in its own process
+    for name in ("AI_SHOT_OPTIONS", "HIT_WEIGHT", "LINE_BONUS"):
+        monkeypatch.setattr(tuning.game, name, getattr(tuning.game, name))
+    monkeypatch.setattr(tuning.game.ENDGAME_SOLVER, "time_budget", tuning.game.ENDGAME_SOLVER.time_budget)
+
+    def ai_shots():
+        shots = []
+        monkeypatch.setattr(tuning.game, "choose_ai_targets",
+                            lambda state: shots.append(choose_ai_targets(state)) or shots[-1])
+        tuning.evaluate(params, 3, 11)
+        return shots
+
+    shots = ai_shots()
+    # On a machine too slow for any wall-clock deadline, the AI fires the same shots
+    clock = itertools.count(step=1000)
+    monkeypatch.setattr(endgame.time, "perf_counter", lambda: next(clock))
+    assert ai_shots() == shots
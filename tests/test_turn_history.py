@@ -0,0 +1,89 @@
+import copy
+import sys
+
+import pytest
+
+from src import game
+from src.turn_history import TurnHistory
+
+
+def snapshot(state):
+    return (copy.deepcopy(state.player_hits), copy.deepcopy(state.ai_hits), set(state.fog_positions),
+            state.hint_uses, state.game_phase, copy.deepcopy(state.probability_map))
+
+
+@pytest.fixture
+def match(rng):
+    """ A practice match 30 turns in, with the state at the start of every turn. """
+    game.set_difficulty("HARD")
+    state = game.GameState()
+    state.place_ai_ships()
+    state.turns = TurnHistory(state)
+    while state.game_phase == "setup":
+        cell = (rng.randrange(game.GRID_SIZE), rng.randrange(game.GRID_SIZE))
+        if game.placement_is_valid(state, cell):
+            game.place_current_ship(state, cell[1], cell[0])
+    snapshots = [snapshot(state)]
+    for turn in range(30):
+        if turn % 10 == 0 and state.hint_uses:
+            state.hint_uses -= 1
+            state.emit("hint", game.pick_hint_positions(state))
+        free = [(x, y) for y in range(game.GRID_SIZE) for x in range(game.GRID_SIZE) if state.player_hits[y][x] == 0]
+        game.apply_player_shot(state, *rng.choice(free))
+        for x, y in game.choose_ai_targets(state):
+            game.apply_ai_shot(state, x, y)
+        state.player_turn = True
+        state.turns.end_turn()
+        snapshots.append(snapshot(state))
+    return state, snapshots
+
+
+def test_seek_restores_every_turn(match, rng):
+    state, snapshots = match
+    assert state.turns.turns == len(snapshots)
+    for turn in [rng.randrange(len(snapshots)) for _ in range(50)] + [0, len(snapshots) - 1]:
+        state.turns.seek(turn)
+        assert snapshot(state) == snapshots[turn]
+    with pytest.raises(IndexError):
+        state.turns.seek(len(snapshots))
+
+
+def test_undo_and_redo_step_whole_turns(match):
+    state, snapshots = match
+    # Half a turn: a shot without the AI's reply
+    game.apply_player_shot(state, *next((x, y) for y in range(game.GRID_SIZE) for x in range(game.GRID_SIZE)
+                                        if state.player_hits[y][x] == 0))
+    partial = snapshot(state)
+    assert state.turns.undo() and snapshot(state) == snapshots[-1]
+    assert state.turns.undo() and snapshot(state) == snapshots[-2]
+    assert state.turns.redo() and snapshot(state) == snapshots[-1]
+    assert state.turns.redo() and snapshot(state) == partial
+    assert not state.turns.redo()
+
+    state.turns.seek(0)
+    assert not state.turns.undo()
+
+
+def test_a_new_move_drops_the_redo_tail(match):
+    state, snapshots = match
+    state.turns.seek(10)
+    game.apply_player_shot(state, *next((x, y) for y in range(game.GRID_SIZE) for x in range(game.GRID_SIZE)
+                                        if state.player_hits[y][x] == 0))
+    assert state.turns.turns == 11
+    assert not state.turns.redo()
+    state.reset()
+    assert state.turns.turns == 0 and state.turns.turn is None
+
+
+def test_fog_changes_take_the_same_space_however_much_fog_moves(match):
+    state, _ = match
+    state.turns.seek(state.turns.turns - 1)
+    everywhere = {(x, y) for y in range(game.GRID_SIZE) for x in range(game.GRID_SIZE)}
+    sizes = []
+    for added, removed in [({(0, 0)}, set()), (everywhere - state.fog_positions, set(state.fog_positions))]:
+        before = set(state.fog_positions)
+        state.fog_positions.symmetric_difference_update(added | removed)
+        state.emit("fog", added, removed)
+        sizes.append(sum(sys.getsizeof(item) for item in state.turns.changes[-1]))
+        assert state.turns.undo() and state.fog_positions == before
+    assert sizes[1] <= sizes[0] + 16  # One cell or the whole board, only the bitmask grows